@@ -0,0 +1,84 @@
+"""
+Compares the throughput of step one computed for a burst of new
+:class:`jpake.JPAKE` sessions with :func:`jpake.batch.batch_one` against
+calling ``one()`` on each session individually.
+
+The shared table used by :func:`~jpake.batch.batch_one` is built once before
+timing starts, as it would be in a long running server; its build time is
+reported separately.
+
+Usage::
+
+    python benchmarks/bench_batch.py [--parameters NAME] [--sizes N ...]
+"""
+import argparse
+import time
+
+import jpake
+
+from jpake.batch import batch_one
+from jpake.exponentiation import DEFAULT_BATCH_WINDOW
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+
+def _sessions(count, parameters):
+    return [
+        jpake.JPAKE(signer_id=b"server", parameters=parameters)
+        for _ in range(count)
+    ]
+
+
+def _individual(sessions):
+    for session in sessions:
+        session.one()
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--parameters', choices=sorted(PARAMETERS), default='NIST_128',
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1, 8, 32, 128, 512],
+    )
+    parser.add_argument('--window', type=int, default=DEFAULT_BATCH_WINDOW)
+    args = parser.parse_args()
+
+    parameters = PARAMETERS[args.parameters]
+
+    build = _time(
+        lambda: parameters.generator_table(args.window, full=True),
+    )
+    print("table build: {:.1f}ms".format(build * 1000))
+
+    # Make sure the table used by ``one()`` is built as well.
+    jpake.JPAKE(parameters=parameters).one()
+
+    print("{:>6} {:>16} {:>16}".format(
+        'batch', 'individual/sec', 'batched/sec',
+    ))
+    for size in args.sizes:
+        individual = _time(_individual, _sessions(size, parameters))
+        batched = _time(
+            lambda sessions: batch_one(sessions, window=args.window),
+            _sessions(size, parameters),
+        )
+        print("{:>6} {:>16.1f} {:>16.1f}".format(
+            size, size / individual, size / batched,
+        ))
+
+
+if __name__ == '__main__':
+    main()
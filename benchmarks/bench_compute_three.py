@@ -0,0 +1,65 @@
+"""
+Compares the latency of the final step of a :class:`jpake.JPAKE` handshake,
+the computation of ``K``, against the unfused two exponentiation form.
+
+Usage::
+
+    python benchmarks/bench_compute_three.py [--repeat N]
+"""
+import argparse
+import statistics
+import time
+
+import jpake
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+
+def _unfused(session):
+    p = session.p
+    q = session.q
+    bottom = pow(session.remote_gx2, session.x2 * (q - session.secret), p)
+    return pow((session.remote_A * bottom) % p, session.x2, p)
+
+
+def _fused(session):
+    session._compute_three()
+    return session._K
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for name, parameters in sorted(PARAMETERS.items()):
+        alice = jpake.JPAKE(
+            secret="hunter42", signer_id=b"alice", parameters=parameters,
+        )
+        bob = jpake.JPAKE(
+            secret="hunter42", signer_id=b"bob", parameters=parameters,
+        )
+        alice.process_one(bob.one()), bob.process_one(alice.one())
+        alice.process_two(bob.two())
+
+        print(name)
+        for label, fn in (('unfused', _unfused), ('fused', _fused)):
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                fn(alice)
+                samples.append(time.perf_counter() - start)
+            print("    {:<8} median {:8.2f}ms  min {:8.2f}ms".format(
+                label,
+                statistics.median(samples) * 1000,
+                min(samples) * 1000,
+            ))
+
+
+if __name__ == '__main__':
+    main()
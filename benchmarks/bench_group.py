@@ -0,0 +1,109 @@
+"""
+Compares the cost of agreeing a key between N members using
+:class:`jpake.group.JPAKEGroup` against running a separate
+:class:`jpake.JPAKE` handshake between every pair of members.
+
+Times are the total CPU time spent by all members, as every member runs in
+this process.  Pairwise handshakes are only run for groups up to
+``--pairwise-max`` members as their cost grows quadratically.
+
+Usage::
+
+    python benchmarks/bench_group.py [--parameters NAME] [--sizes N ...]
+"""
+import argparse
+import itertools
+import time
+
+import jpake
+
+from jpake.group import JPAKEGroup
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+
+def _others(values, index):
+    return values[:index] + values[index + 1:]
+
+
+def _group(size, parameters):
+    members = [
+        JPAKEGroup(
+            secret="hunter42", signer_id="member-%d" % index,
+            parameters=parameters,
+        )
+        for index in range(size)
+    ]
+
+    ones = [member.one() for member in members]
+    for index, member in enumerate(members):
+        member.process_one(_others(ones, index))
+
+    twos = [member.two() for member in members]
+    for index, member in enumerate(members):
+        member.process_two(_others(twos, index))
+
+    threes = [member.three() for member in members]
+    for index, member in enumerate(members):
+        member.process_three(_others(threes, index))
+
+    assert len({member.K for member in members}) == 1
+
+
+def _pairwise(size, parameters):
+    for a, b in itertools.combinations(range(size), 2):
+        alice = jpake.JPAKE(
+            secret="hunter42", signer_id="member-%d" % a,
+            parameters=parameters,
+        )
+        bob = jpake.JPAKE(
+            secret="hunter42", signer_id="member-%d" % b,
+            parameters=parameters,
+        )
+        alice.process_one(bob.one()), bob.process_one(alice.one())
+        alice.process_two(bob.two()), bob.process_two(alice.two())
+        assert alice.K == bob.K
+
+
+def _time(fn, *args):
+    start = time.process_time()
+    fn(*args)
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--parameters', choices=sorted(PARAMETERS), default='NIST_80',
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[3, 4, 8, 16, 32, 64],
+    )
+    parser.add_argument('--pairwise-max', type=int, default=16)
+    args = parser.parse_args()
+
+    parameters = PARAMETERS[args.parameters]
+
+    print("{:>4} {:>12} {:>12} {:>12}".format(
+        'N', 'group', 'pairwise', 'per member',
+    ))
+    for size in args.sizes:
+        group = _time(_group, size, parameters)
+        if size <= args.pairwise_max:
+            pairwise = "{:10.1f}ms".format(
+                _time(_pairwise, size, parameters) * 1000
+            )
+        else:
+            pairwise = "-"
+        print("{:>4} {:10.1f}ms {:>12} {:10.2f}ms".format(
+            size, group * 1000, pairwise, group / size * 1000,
+        ))
+
+
+if __name__ == '__main__':
+    main()
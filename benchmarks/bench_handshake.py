@@ -0,0 +1,75 @@
+"""
+Measures the time taken by each step of a :class:`jpake.JPAKE` handshake.
+
+Usage::
+
+    python benchmarks/bench_handshake.py [--repeat N] [--parameters NAME ...]
+"""
+import argparse
+import statistics
+import time
+
+import jpake
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+
+def _handshake(parameters, timings):
+    alice = jpake.JPAKE(
+        secret="hunter42", signer_id=b"alice", parameters=parameters,
+    )
+    bob = jpake.JPAKE(
+        secret="hunter42", signer_id=b"bob", parameters=parameters,
+    )
+
+    def step(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+        return result
+
+    alice_one = step('one', alice.one)
+    bob_one = bob.one()
+
+    step('process_one', alice.process_one, bob_one)
+    bob.process_one(alice_one)
+
+    alice_two = step('two', alice.two)
+    bob_two = bob.two()
+
+    step('process_two', alice.process_two, bob_two)
+    bob.process_two(alice_two)
+
+    step('K', lambda: alice.K)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument(
+        '--parameters', nargs='+', choices=sorted(PARAMETERS),
+        default=sorted(PARAMETERS),
+    )
+    args = parser.parse_args()
+
+    for name in args.parameters:
+        timings = {}
+        for _ in range(args.repeat):
+            _handshake(PARAMETERS[name], timings)
+
+        print(name)
+        for step, samples in timings.items():
+            print("    {:<12} median {:8.2f}ms  min {:8.2f}ms".format(
+                step,
+                statistics.median(samples) * 1000,
+                min(samples) * 1000,
+            ))
+
+
+if __name__ == '__main__':
+    main()
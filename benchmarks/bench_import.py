@@ -0,0 +1,45 @@
+"""
+Measures the time taken to import :mod:`jpake` in a fresh interpreter.
+
+Usage::
+
+    python benchmarks/bench_import.py [--repeat N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+def _time_import(statement):
+    start = time.perf_counter()
+    subprocess.check_call([sys.executable, '-c', statement])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ('interpreter startup', 'pass'),
+        ('import jpake', 'import jpake'),
+        (
+            'import jpake, first use of NIST_128',
+            'import jpake; jpake.NIST_128.p',
+        ),
+    ]
+
+    for name, statement in cases:
+        samples = [_time_import(statement) for _ in range(args.repeat)]
+        print("{:<40} median {:8.2f}ms  min {:8.2f}ms".format(
+            name,
+            statistics.median(samples) * 1000,
+            min(samples) * 1000,
+        ))
+
+
+if __name__ == '__main__':
+    main()
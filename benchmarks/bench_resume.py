@@ -0,0 +1,75 @@
+"""
+Compares the cost of a full :class:`jpake.JPAKE` handshake, both ends, with
+that of resuming a session from a ticket.
+
+Usage::
+
+    python benchmarks/bench_resume.py [--repeat N]
+"""
+import argparse
+import statistics
+import time
+
+import jpake
+
+from jpake.resumption import ResumeClient, TicketIssuer, resumption_secret
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+
+def _handshake(parameters):
+    alice = jpake.JPAKE(
+        secret="hunter42", signer_id=b"alice", parameters=parameters,
+    )
+    bob = jpake.JPAKE(
+        secret="hunter42", signer_id=b"bob", parameters=parameters,
+    )
+    alice.process_one(bob.one()), bob.process_one(alice.one())
+    alice.process_two(bob.two()), bob.process_two(alice.two())
+    return alice, bob
+
+
+def _resume(issuer, ticket, secret):
+    client = ResumeClient(ticket=ticket, secret=secret)
+    server, reply = issuer.resume(client.hello())
+    client.process_reply(reply)
+    server.process_confirm(client.confirm())
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    # The same ticket is resumed repeatedly, so it can't be single use.
+    issuer = TicketIssuer(replay_cache=False)
+    for name, parameters in sorted(PARAMETERS.items()):
+        client, server = _handshake(parameters)
+        ticket = issuer.issue(resumption_secret(server))
+        secret = resumption_secret(client)
+
+        full = _time(lambda: _handshake(parameters), args.repeat)
+        resumed = _time(
+            lambda: _resume(issuer, ticket, secret), args.repeat * 10,
+        )
+        print("{:<10} full {:8.2f}ms  resumed {:8.3f}ms  ({:.2%})".format(
+            name, full * 1000, resumed * 1000, resumed / full,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures the throughput of offline re-verification of recorded handshake
+transcripts with :func:`jpake.transcript.verify_transcripts`.
+
+Writes ``--count`` transcripts to a temporary log, then re-verifies them with
+the given number of worker processes.
+
+Usage::
+
+    python benchmarks/bench_reverify.py --parameters NIST_128 \\
+        --count 500 --processes 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import jpake
+
+from jpake.transcript import TranscriptWriter, verify_transcripts
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+
+def _transcript(parameters):
+    alice = jpake.JPAKE(
+        secret="hunter42", signer_id=b"alice", parameters=parameters,
+    )
+    bob = jpake.JPAKE(
+        secret="hunter42", signer_id=b"bob", parameters=parameters,
+    )
+    alice.process_one(bob.one()), bob.process_one(alice.one())
+    alice.process_two(bob.two()), bob.process_two(alice.two())
+    return alice.transcript()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        '--parameters', choices=sorted(PARAMETERS), default='NIST_128',
+    )
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    parameters = PARAMETERS[args.parameters]
+
+    # Recording unique handshakes is slow, so repeat a small number of them.
+    samples = [_transcript(parameters) for _ in range(min(args.count, 20))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'transcripts.log')
+        with TranscriptWriter(path) as writer:
+            for index in range(args.count):
+                writer.append(samples[index % len(samples)])
+
+        start = time.perf_counter()
+        failures = list(verify_transcripts(
+            [path], processes=args.processes, batch_size=args.batch_size,
+        ))
+        elapsed = time.perf_counter() - start
+
+        print("transcripts:   {}".format(args.count))
+        print("log size:      {:.1f}KB".format(os.path.getsize(path) / 1024))
+        print("failures:      {}".format(len(failures)))
+        print("elapsed:       {:.2f}s".format(elapsed))
+        print("per second:    {:.1f}".format(args.count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
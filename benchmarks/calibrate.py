@@ -0,0 +1,43 @@
+"""
+Calibrates exponentiation window sizes for the builtin parameter sets on this
+machine and saves the results where new :class:`jpake.JPAKE` instances will
+find them.
+
+Usage::
+
+    python benchmarks/calibrate.py [--repeat N] [--path PATH]
+"""
+import argparse
+
+import jpake
+
+from jpake.tuning import calibrate, default_cache_path
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--path', default=None)
+    parser.add_argument(
+        '--parameters', nargs='+', choices=sorted(PARAMETERS),
+        default=sorted(PARAMETERS),
+    )
+    args = parser.parse_args()
+
+    for name in args.parameters:
+        tuning = calibrate(
+            PARAMETERS[name], repeat=args.repeat, path=args.path,
+        )
+        print("{:<10} {!r}".format(name, tuning))
+    print("saved to {}".format(args.path or default_cache_path()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Load generator that runs concurrent :class:`jpake.JPAKE` handshakes between
+clients and servers talking over localhost TCP or unix sockets.
+
+Every connection performs one full handshake:
+
+- the client sends ``one()`` and the server replies with its own ``one()``,
+- the client sends ``two()`` and the server replies with its own ``two()``,
+- the client sends a hash of ``K`` and the server confirms that it matches.
+
+Clients and servers share a single event loop, so the numbers reflect what a
+single threaded asyncio service can sustain including both ends of the
+handshake.
+
+Usage::
+
+    python benchmarks/loadtest.py --parameters NIST_80 \\
+        --clients 16 --servers 2 --handshakes 500 --rtt 0.01
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import tempfile
+import time
+
+from hashlib import sha256
+
+import jpake
+
+from jpake.exceptions import InvalidProofError
+
+
+PARAMETERS = {
+    'NIST_80': jpake.NIST_80,
+    'NIST_112': jpake.NIST_112,
+    'NIST_128': jpake.NIST_128,
+}
+
+ROUNDS = ('one', 'two', 'confirm', 'total')
+
+
+def _encode(message):
+    def default(value):
+        if isinstance(value, bytes):
+            return {'$bytes': value.hex()}
+        raise TypeError(value)
+    return json.dumps(message, default=default).encode('ascii') + b'\n'
+
+
+def _decode(line):
+    def object_hook(value):
+        if set(value) == {'$bytes'}:
+            return bytes.fromhex(value['$bytes'])
+        return value
+    return json.loads(line.decode('ascii'), object_hook=object_hook)
+
+
+def _confirmation(session):
+    k = session.K
+    return sha256(k.to_bytes((k.bit_length() + 7) // 8, 'big')).hexdigest()
+
+
+class LoadTest(object):
+    def __init__(self, *, parameters, rtt, transport):
+        self.parameters = parameters
+        self.rtt = rtt
+        self.transport = transport
+        self.secret = "correct horse battery staple"
+
+        self.latencies = {name: [] for name in ROUNDS}
+        self.completed = 0
+        self.failed = 0
+
+    async def _send(self, writer, message):
+        # Model the network by delaying each message by half a round trip.
+        if self.rtt:
+            await asyncio.sleep(self.rtt / 2)
+        writer.write(_encode(message))
+        await writer.drain()
+
+    async def _receive(self, reader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by peer")
+        return _decode(line)
+
+    async def _handle(self, reader, writer):
+        try:
+            session = jpake.JPAKE(
+                secret=self.secret, signer_id=b"server",
+                parameters=self.parameters,
+            )
+
+            session.process_one(await self._receive(reader))
+            await self._send(writer, session.one())
+
+            session.process_two(await self._receive(reader))
+            await self._send(writer, session.two())
+
+            confirmed = (await self._receive(reader)) == _confirmation(session)
+            await self._send(writer, confirmed)
+        except (ConnectionError, InvalidProofError):
+            pass
+        finally:
+            writer.close()
+
+    async def _client(self, address, count):
+        for _ in range(count):
+            if self.transport == 'unix':
+                reader, writer = await asyncio.open_unix_connection(address)
+            else:
+                reader, writer = await asyncio.open_connection(*address)
+
+            try:
+                session = jpake.JPAKE(
+                    secret=self.secret, signer_id=b"client",
+                    parameters=self.parameters,
+                )
+
+                start = time.perf_counter()
+                await self._send(writer, session.one())
+                session.process_one(await self._receive(reader))
+                one = time.perf_counter()
+
+                await self._send(writer, session.two())
+                session.process_two(await self._receive(reader))
+                two = time.perf_counter()
+
+                await self._send(writer, _confirmation(session))
+                confirmed = await self._receive(reader)
+                end = time.perf_counter()
+            except (ConnectionError, InvalidProofError):
+                self.failed += 1
+                continue
+            finally:
+                writer.close()
+
+            if not confirmed:
+                self.failed += 1
+                continue
+
+            self.completed += 1
+            self.latencies['one'].append(one - start)
+            self.latencies['two'].append(two - one)
+            self.latencies['confirm'].append(end - two)
+            self.latencies['total'].append(end - start)
+
+    async def _start_servers(self, count, directory):
+        servers = []
+        addresses = []
+        for index in range(count):
+            if self.transport == 'unix':
+                path = os.path.join(directory, 'server-%d.sock' % index)
+                server = await asyncio.start_unix_server(self._handle, path)
+                addresses.append(path)
+            else:
+                server = await asyncio.start_server(
+                    self._handle, '127.0.0.1', 0,
+                )
+                addresses.append(server.sockets[0].getsockname()[:2])
+            servers.append(server)
+        return servers, addresses
+
+    async def run(self, *, clients, servers, handshakes):
+        with tempfile.TemporaryDirectory() as directory:
+            listeners, addresses = await self._start_servers(
+                servers, directory,
+            )
+            try:
+                # Spread the handshakes as evenly as possible over the clients
+                # and the clients round-robin over the servers.
+                counts = [
+                    handshakes // clients + (index < handshakes % clients)
+                    for index in range(clients)
+                ]
+                await asyncio.gather(*(
+                    self._client(addresses[index % servers], count)
+                    for index, count in enumerate(counts)
+                ))
+            finally:
+                for listener in listeners:
+                    listener.close()
+                    await listener.wait_closed()
+
+
+def _percentile(samples, fraction):
+    # Nearest rank.
+    ordered = sorted(samples)
+    rank = int(round(fraction * len(ordered)))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        '--parameters', choices=sorted(PARAMETERS), default='NIST_128',
+    )
+    parser.add_argument(
+        '--clients', type=int, default=8,
+        help="number of concurrent client connections",
+    )
+    parser.add_argument(
+        '--servers', type=int, default=1,
+        help="number of listening server sockets",
+    )
+    parser.add_argument(
+        '--handshakes', type=int, default=100,
+        help="total number of handshakes to perform",
+    )
+    parser.add_argument(
+        '--rtt', type=float, default=0.0,
+        help="injected round trip time in seconds",
+    )
+    parser.add_argument(
+        '--transport', choices=('tcp', 'unix'), default='tcp',
+    )
+    args = parser.parse_args()
+
+    test = LoadTest(
+        parameters=PARAMETERS[args.parameters],
+        rtt=args.rtt, transport=args.transport,
+    )
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test.run(
+            clients=args.clients, servers=args.servers,
+            handshakes=args.handshakes,
+        ))
+    finally:
+        loop.close()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    # ``ru_maxrss`` is reported in kilobytes on linux.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print("parameters:         {}".format(args.parameters))
+    print("transport:          {}".format(args.transport))
+    print("clients/servers:    {}/{}".format(args.clients, args.servers))
+    print("injected rtt:       {:.1f}ms".format(args.rtt * 1000))
+    print("completed/failed:   {}/{}".format(test.completed, test.failed))
+    print("wall time:          {:.2f}s".format(wall))
+    if test.completed:
+        print("handshakes/sec:     {:.1f}".format(test.completed / wall))
+        print("cpu per handshake:  {:.2f}ms (both ends)".format(
+            cpu / test.completed * 1000,
+        ))
+    print("peak rss:           {:.1f}MB".format(peak_rss))
+
+    if test.completed:
+        print()
+        print("{:<10} {:>10} {:>10} {:>10} {:>10}".format(
+            'round', 'mean', 'p50', 'p95', 'p99',
+        ))
+        for name in ROUNDS:
+            samples = test.latencies[name]
+            print("{:<10} {:>8.2f}ms {:>8.2f}ms {:>8.2f}ms {:>8.2f}ms".format(
+                name,
+                statistics.mean(samples) * 1000,
+                _percentile(samples, 0.50) * 1000,
+                _percentile(samples, 0.95) * 1000,
+                _percentile(samples, 0.99) * 1000,
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,14 @@
 from types import MappingProxyType
 from random import SystemRandom
-from hashlib import sha1
+from hashlib import sha1, sha256, sha512
+import hmac
 
 from jpake.parameters import NIST_80, NIST_112, NIST_128
+from jpake.exponentiation import FixedBaseTable, multi_pow
 
 from jpake.exceptions import (
     DuplicateSignerError, InvalidProofError, OutOfSequenceError,
+    ReplayedProofError,
 )
 
 
@@ -17,40 +20,108 @@ def _to_bytes(num):
     return num.to_bytes((num.bit_length() // 8) + 1, byteorder='big')
 
 
+def _uniform_below(read, bound):
+    """
+    Returns an integer in the range ``[0, bound)`` from the bytes returned by
+    ``read(length)``, which should be pseudo-random.
+
+    Takes 64 bits more than are needed so that the bias introduced by
+    reducing mod ``bound`` is negligible.
+    """
+    length = (bound.bit_length() + 64 + 7) // 8
+    return _from_bytes(read(length)) % bound
+
+
+def _pascal(s):
+    """
+    Encode a byte string as a pascal string with a big-endian header
+    """
+    if len(s) >= 2**16:
+        raise ValueError("cannot encode value greater than (2^8)^(2^16)")
+    return len(s).to_bytes(2, 'big') + s
+
+
 def _default_zkp_hash_fn(*, g, gr, gx, signer_id):
     """
     Implementation of the zero knowledge proof hash algorithm used by openSSL.
 
     https://github.com/openssl/openssl/blob/master/crypto/jpake/jpake.c#L166
     """
-    def pascal(s):
-        """
-        Encode a byte string as a pascal string with a big-endian header
-        """
-        if len(s) >= 2**16:
-            raise ValueError("cannot encode value greater than (2^8)^(2^16)")
-        return len(s).to_bytes(2, 'big') + s
-
     s = b"".join((
-        pascal(_to_bytes(g)),
-        pascal(_to_bytes(gr)),
-        pascal(_to_bytes(gx)),
-        pascal(signer_id)
+        _pascal(_to_bytes(g)),
+        _pascal(_to_bytes(gr)),
+        _pascal(_to_bytes(gx)),
+        _pascal(signer_id)
     ))
     return _from_bytes(sha1(s).digest())
 
 
+#: Bit length of each of the two challenges in a compact step one proof.
+_COMPACT_CHALLENGE_BITS = 160
+
+
+def _compact_zkp_hash_fn(*, g, gr, gx1, gx2, signer_id):
+    """
+    Hash used for the single proof of knowledge of both ``x1`` and ``x2``
+    sent in compact mode.  Returns a pair of independent challenges.
+    """
+    s = b"".join((
+        _pascal(_to_bytes(g)),
+        _pascal(_to_bytes(gr)),
+        _pascal(_to_bytes(gx1)),
+        _pascal(_to_bytes(gx2)),
+        _pascal(signer_id)
+    ))
+    h = _from_bytes(sha512(s).digest())
+    mask = (1 << _COMPACT_CHALLENGE_BITS) - 1
+    return h & mask, (h >> _COMPACT_CHALLENGE_BITS) & mask
+
+
+def _derive_nonce(seed, *, q, generator, exponent, gx, signer_id):
+    """
+    Derives a proof nonce in the range ``[0, q)`` from ``seed``, the exponent
+    being proven, and the context that the proof will be made in, in the
+    spirit of RFC 6979.
+
+    The same inputs always give the same nonce, so a proof can be repeated
+    but two different proofs will never share a nonce, which would reveal the
+    exponent.
+    """
+    message = b"".join(
+        _pascal(value)
+        for value in (
+            _to_bytes(q), _to_bytes(generator), _to_bytes(gx),
+            _to_bytes(exponent % q), signer_id,
+        )
+    )
+
+    def read(length):
+        stream = b""
+        counter = 0
+        while len(stream) < length:
+            stream += hmac.new(
+                seed, counter.to_bytes(4, 'big') + message, sha256
+            ).digest()
+            counter += 1
+        return stream[:length]
+
+    return _uniform_below(read, q)
+
+
 class JPAKE(object):
     __slots__ = [
-        '_rng', '_zkp_hash',
+        '_rng', '_zkp_hash', '_nonce_seed', '_replay_cache', '_parameters',
+        '_tuning', '_compact',
         'waiting_secret', 'waiting_one', 'waiting_two',
         'p', 'g', 'q',
         '_secret', 'signer_id',
         '_A', '_zkp_A',
-        '_x1', '_x2', '_gx1', '_gx2', '_zkp_x1', '_zkp_x2',
+        '_x1', '_x2', '_gx1', '_gx2', '_zkp_x1', '_zkp_x2', '_zkp_x1_x2',
         '_remote_A', '_remote_zkp_A',
         '_remote_gx1', '_remote_gx2', '_remote_zkp_x1', '_remote_zkp_x2',
+        '_remote_zkp_x1_x2',
         '_K',
+        '_executor', '_pending_two', '_pending_three',
     ]
 
     # Variables set at initialisation.
@@ -121,11 +192,13 @@ class JPAKE(object):
     @property
     def zkp_x1(self):
         """
-        Proof of knowledge of :math:`x1`.
+        Proof of knowledge of :math:`x1`.  Not available in compact mode.
 
         .. note::
             This is a derived value and does not need to be persisted.
         """
+        if self._compact:
+            raise AttributeError("zkp_x1 is not used in compact mode")
         if not hasattr(self, '_zkp_x1'):
             self._compute_one()
         return self._zkp_x1
@@ -133,15 +206,32 @@ class JPAKE(object):
     @property
     def zkp_x2(self):
         """
-        Proof of knowledge of :math:`x2`.
+        Proof of knowledge of :math:`x2`.  Not available in compact mode.
 
         .. note::
             This is a derived value and does not need to be persisted.
         """
+        if self._compact:
+            raise AttributeError("zkp_x2 is not used in compact mode")
         if not hasattr(self, '_zkp_x2'):
             self._compute_one()
         return self._zkp_x2
 
+    @property
+    def zkp_x1_x2(self):
+        """
+        Combined proof of knowledge of both :math:`x1` and :math:`x2`.  Only
+        available in compact mode.
+
+        .. note::
+            This is a derived value and does not need to be persisted.
+        """
+        if not self._compact:
+            raise AttributeError("zkp_x1_x2 is only used in compact mode")
+        if not hasattr(self, '_zkp_x1_x2'):
+            self._compute_one()
+        return self._zkp_x1_x2
+
     # Variables sent by the other participant for phase one.
     @property
     def remote_gx1(self):
@@ -181,6 +271,16 @@ class JPAKE(object):
             raise AttributeError()
         return self._remote_zkp_x2
 
+    @property
+    def remote_zkp_x1_x2(self):
+        """
+        Combined proof of knowledge of :math:`x3` and :math:`x4`, if the
+        other participant sent one.
+        """
+        if self.waiting_one:
+            raise AttributeError()
+        return self._remote_zkp_x1_x2
+
     # Variables that can be computed after receiving the phase one data from
     # the other participant.
     @property
@@ -195,7 +295,7 @@ class JPAKE(object):
         """
         if not hasattr(self, '_A'):
             try:
-                self._compute_two()
+                self._finish_two()
             except OutOfSequenceError as e:
                 raise AttributeError("A is not available yet") from e
         return self._A
@@ -212,7 +312,7 @@ class JPAKE(object):
         """
         if not hasattr(self, '_zkp_A'):
             try:
-                self._compute_two()
+                self._finish_two()
             except OutOfSequenceError as e:
                 raise AttributeError("zkp_A is not available yet") from e
         return self._zkp_A
@@ -255,7 +355,7 @@ class JPAKE(object):
 
         if not hasattr(self, '_K'):
             try:
-                self._compute_three()
+                self._finish_three()
             except OutOfSequenceError as e:
                 raise AttributeError("K is not available yet") from e
         return self._K
@@ -264,7 +364,8 @@ class JPAKE(object):
         self, *, x1=None, x2=None, secret=None,
         remote_gx1=None, remote_gx2=None, remote_A=None,
         parameters=NIST_128, signer_id=None,
-        zkp_hash_function=None, random=None
+        zkp_hash_function=None, random=None, replay_cache=None,
+        tuning=None, executor=None, nonce_seed=None, compact=False
     ):
         if random is None:
             random = SystemRandom()
@@ -274,6 +375,26 @@ class JPAKE(object):
             zkp_hash_function = _default_zkp_hash_fn
         self._zkp_hash = zkp_hash_function
 
+        # If a seed is provided, proof nonces are derived from it instead of
+        # being drawn from ``random``.
+        if isinstance(nonce_seed, str):
+            nonce_seed = nonce_seed.encode('utf-8')
+        if nonce_seed is not None and len(nonce_seed) < 16:
+            raise ValueError("nonce_seed must be at least 16 bytes")
+        self._nonce_seed = nonce_seed
+
+        # In compact mode step one carries a single proof of knowledge of
+        # both ``x1`` and ``x2``.  Both ends must agree to use it.
+        self._compact = compact
+
+        self._replay_cache = replay_cache
+
+        # If an executor is provided, steps two and three are scheduled on it
+        # as soon as their inputs are available.
+        self._executor = executor
+        self._pending_two = None
+        self._pending_three = None
+
         self.waiting_secret = True
         self.waiting_one = True
         self.waiting_two = True
@@ -287,6 +408,14 @@ class JPAKE(object):
         self.p = parameters.p
         self.g = parameters.g
         self.q = parameters.q
+        self._parameters = parameters
+
+        if tuning is None:
+            # Imported here as reading the tuning cache needs modules that
+            # are slow to import and often not otherwise used.
+            from jpake.tuning import get_tuning
+            tuning = get_tuning(parameters)
+        self._tuning = tuning
 
         # Setup hidden state
         if x1 is None:
@@ -318,34 +447,107 @@ class JPAKE(object):
         if remote_A is not None:
             self.process_two(remote_A=remote_A, verify=False)
 
-    def _zkp(self, generator, exponent, gx=None):
+    def _zkp(self, generator, exponent, gx=None, *, table=None):
         """
         Returns a proof that can be used by someone who only has knowledge
         of ``generator`` and ``p`` that we have a value for ``exponent`` that
         satisfies the equation ``generator^exponent=B mod p``
+
+        If a :class:`~jpake.exponentiation.FixedBaseTable` for ``generator``
+        is passed as ``table`` it will be used for the exponentiation.
         """
         p = self.p
-        q = self.q
 
         if gx is None:
             gx = pow(generator, exponent, p)
-        r = self._rng.randrange(q)
-        gr = pow(generator, r, p)
+        r = self._zkp_nonce(generator, exponent, gx)
+        if table is None:
+            gr = pow(generator, r, p)
+        else:
+            gr = table.pow(r)
+        return self._zkp_response(generator, exponent, gx, r, gr)
+
+    def _zkp_nonce(self, generator, exponent, gx):
+        """Returns the random value to commit to in a proof of knowledge of
+        ``exponent``.
+
+        If the instance was created with a ``nonce_seed`` the value is derived
+        from the seed and the context of the proof rather than drawn from the
+        random number generator.
+        """
+        if self._nonce_seed is not None:
+            return _derive_nonce(
+                self._nonce_seed, q=self.q, generator=generator,
+                exponent=exponent, gx=gx, signer_id=self.signer_id,
+            )
+        return self._rng.randrange(self.q)
+
+    def _zkp_response(self, generator, exponent, gx, r, gr):
+        """Completes a proof given the nonce ``r`` and the commitment
+        ``gr = generator^r``.
+        """
         h = self._zkp_hash(
             g=generator, gr=gr, gx=gx, signer_id=self.signer_id
         )
-        b = (r - exponent*h) % q
+        b = (r - exponent*h) % self.q
+        return {
+            'gr': gr,
+            'b': b,
+            'id': self.signer_id,
+        }
+
+    def _compact_nonce(self, gx1, gx2):
+        """Returns the random value to commit to in a combined proof of
+        knowledge of ``x1`` and ``x2``.
+        """
+        # ``gx1 + p*gx2`` identifies the pair of values uniquely, and can't
+        # collide with the context of any single value proof.
+        return self._zkp_nonce(self.g, self.x1, gx1 + self.p * gx2)
+
+    def _compact_zkp_response(self, gx1, gx2, r, gr):
+        """Completes a combined proof of knowledge of ``x1`` and ``x2``
+        given the nonce ``r`` and the commitment ``gr = g^r``.
+        """
+        c1, c2 = _compact_zkp_hash_fn(
+            g=self.g, gr=gr, gx1=gx1, gx2=gx2, signer_id=self.signer_id,
+        )
+        b = (r - self.x1*c1 - self.x2*c2) % self.q
         return {
             'gr': gr,
             'b': b,
             'id': self.signer_id,
         }
 
-    def _verify_zkp(self, generator, gx, zkp):
+    def _check_replay(self, *statements):
+        """Raises :class:`ReplayedProofError` if any of the ``(gx, zkp)``
+        pairs passed have already been seen by the replay cache.  ``gx`` is
+        a tuple for a proof covering several values.
+
+        All of the proofs are recorded, even if an earlier one has been seen.
+        """
+        if self._replay_cache is None:
+            return
+
+        from jpake.cache import proof_digest
+
+        replayed = False
+        for gx, zkp in statements:
+            digest = proof_digest(gx, zkp, p=self.p, q=self.q)
+            if self._replay_cache.seen(digest):
+                replayed = True
+
+        if replayed:
+            raise ReplayedProofError("proof has already been seen")
+
+    def _verify_zkp(self, generator, gx, zkp, *, table=None):
         """Verify that the senders proof that they know ``x`` such that
         ``generator^{x} mod p = gx`` holds.
+
+        If a :class:`~jpake.exponentiation.FixedBaseTable` for ``generator``
+        is passed as ``table`` it will be used for the exponentiation.
         """
         p = self.p
+        window = self._tuning.multi_window
         gr = zkp['gr']
         b = zkp['b']
 
@@ -354,9 +556,36 @@ class JPAKE(object):
         h = self._zkp_hash(
             g=generator, gr=gr, gx=gx, signer_id=zkp['id']
         )
-        gb = pow(generator, b, p)
-        y = pow(gx, h, p)
-        if gr != (gb*y) % p:
+        if table is None:
+            # Check ``gr == generator^b * gx^h`` with a single chain of
+            # squarings.
+            expected = multi_pow(((generator, b), (gx, h)), p, window=window)
+        else:
+            expected = (
+                table.pow(b) * multi_pow(((gx, h),), p, window=window)
+            ) % p
+        if gr != expected:
+            raise InvalidProofError()
+
+    def _verify_compact_zkp(self, gx1, gx2, zkp, *, table):
+        """Verify the senders proof that they know both ``x1`` and ``x2``
+        such that ``g^{x1} mod p = gx1`` and ``g^{x2} mod p = gx2``.
+
+        Checks ``gr == g^b * gx1^c1 * gx2^c2`` with a single chain of
+        squarings shared by both values.
+        """
+        p = self.p
+        gr = zkp['gr']
+
+        if zkp['id'] == self.signer_id:
+            raise DuplicateSignerError(zkp['id'])
+        c1, c2 = _compact_zkp_hash_fn(
+            g=self.g, gr=gr, gx1=gx1, gx2=gx2, signer_id=zkp['id'],
+        )
+        expected = (table.pow(zkp['b']) * multi_pow(
+            ((gx1, c1), (gx2, c2)), p, window=self._tuning.multi_window,
+        )) % p
+        if gr != expected:
             raise InvalidProofError()
 
     def set_secret(self, value):
@@ -375,15 +604,71 @@ class JPAKE(object):
         self._secret = value
         self.waiting_secret = False
 
+        self._schedule_two()
+
+    def _generator_table(self):
+        return self._parameters.generator_table(
+            self._tuning.fixed_base_window
+        )
+
     def _compute_one(self):
-        self._gx1 = pow(self.g, self.x1, self.p)
-        self._gx2 = pow(self.g, self.x2, self.p)
+        g_table = self._generator_table()
 
-        self._zkp_x1 = MappingProxyType(self._zkp(self.g, self.x1, self.gx1))
-        self._zkp_x2 = MappingProxyType(self._zkp(self.g, self.x2, self.gx2))
+        gx1 = g_table.pow(self.x1)
+        gx2 = g_table.pow(self.x2)
+
+        if self._compact:
+            r = self._compact_nonce(gx1, gx2)
+            self._set_compact_one(
+                gx1, gx2,
+                self._compact_zkp_response(gx1, gx2, r, g_table.pow(r)),
+            )
+            return
+
+        self._set_one(
+            gx1, gx2,
+            self._zkp(self.g, self.x1, gx1, table=g_table),
+            self._zkp(self.g, self.x2, gx2, table=g_table),
+        )
+
+    def _share_x1(self, other):
+        """
+        Computes step one reusing ``gx1`` and its proof from ``other``, which
+        must have been created with the same ``x1``, ``signer_id`` and
+        parameters.  Only ``gx2`` and its proof are computed.
+        """
+        if other.x1 != self.x1 or other.signer_id != self.signer_id:
+            raise ValueError("can only share x1 with a matching instance")
+        if self._compact or other._compact:
+            raise ValueError("can't share x1 in compact mode")
+
+        g_table = self._generator_table()
+        gx2 = g_table.pow(self.x2)
+        self._set_one(
+            other.gx1, gx2, other.zkp_x1,
+            self._zkp(self.g, self.x2, gx2, table=g_table),
+        )
+
+    def _set_one(self, gx1, gx2, zkp_x1, zkp_x2):
+        self._gx1 = gx1
+        self._gx2 = gx2
+        self._zkp_x1 = MappingProxyType(zkp_x1)
+        self._zkp_x2 = MappingProxyType(zkp_x2)
+
+    def _set_compact_one(self, gx1, gx2, zkp_x1_x2):
+        self._gx1 = gx1
+        self._gx2 = gx2
+        self._zkp_x1_x2 = MappingProxyType(zkp_x1_x2)
 
     def one(self):
-        self._compute_one()
+        if not hasattr(self, '_gx2'):
+            self._compute_one()
+        if self._compact:
+            return {
+                'gx1': self.gx1,
+                'gx2': self.gx2,
+                'zkp_x1_x2': dict(self.zkp_x1_x2),
+            }
         return {
             'gx1': self.gx1,
             'zkp_x1': dict(self.zkp_x1),
@@ -394,7 +679,7 @@ class JPAKE(object):
     def process_one(
         self, data=None, *,
         remote_gx1=None, remote_gx2=None,
-        remote_zkp_x1=None, remote_zkp_x2=None,
+        remote_zkp_x1=None, remote_zkp_x2=None, remote_zkp_x1_x2=None,
         verify=True
     ):
         """
@@ -415,10 +700,13 @@ class JPAKE(object):
             Proof that ``x3`` is known by the caller.
         :param remote_zkp_x2:
             Proof that ``x4`` is known by the caller.
+        :param remote_zkp_x1_x2:
+            In compact mode, proof that both ``x3`` and ``x4`` are known by
+            the caller.  Replaces ``remote_zkp_x1`` and ``remote_zkp_x2``.
 
         :param verify:
-            If ``False`` then ``remote_zkp_x1`` and ``remote_zkp_x2`` are
-            ignored and proof verification is skipped.  This is a bad idea
+            If ``False`` then the proofs are ignored and proof verification is
+            skipped.  This is a bad idea
             unless ``remote_gx1`` and ``remote_gx2`` have already been verified
             and is disallowed entirely if arguments are passed in a ``dict``.
 
@@ -426,6 +714,9 @@ class JPAKE(object):
             If called more than once.
         :raises InvalidProofError:
             If verification is enabled and either of the proofs fail
+        :raises ReplayedProofError:
+            If verification is enabled and either of the proofs has already
+            been seen by the replay cache.
         """
         p = self.p
         g = self.g
@@ -438,6 +729,7 @@ class JPAKE(object):
                 param is not None
                 for param in (
                     remote_gx1, remote_gx2, remote_zkp_x1, remote_zkp_x2,
+                    remote_zkp_x1_x2,
                 )
             ):
                 raise TypeError("unexpected keyword argument")
@@ -448,8 +740,11 @@ class JPAKE(object):
             remote_gx1 = data['gx1']
             remote_gx2 = data['gx2']
 
-            remote_zkp_x1 = data['zkp_x1']
-            remote_zkp_x2 = data['zkp_x2']
+            if self._compact:
+                remote_zkp_x1_x2 = data['zkp_x1_x2']
+            else:
+                remote_zkp_x1 = data['zkp_x1']
+                remote_zkp_x2 = data['zkp_x2']
 
         # we need to at least check this for ``remote_gx2`` in order to prevent
         # callers sneaking in ``remote_gx2 mod p`` equal to 1
@@ -459,20 +754,35 @@ class JPAKE(object):
         if remote_gx2 == 1:
             raise ValueError("remote_gx2 must not be one")
 
-        if verify:
+        if verify and self._compact:
+            if remote_zkp_x1_x2 is None:
+                raise TypeError("expected zero knowledge proof")
+            self._check_replay(((remote_gx1, remote_gx2), remote_zkp_x1_x2))
+            self._verify_compact_zkp(
+                remote_gx1, remote_gx2, remote_zkp_x1_x2,
+                table=self._generator_table(),
+            )
+        elif verify:
             if remote_zkp_x1 is None or remote_zkp_x2 is None:
                 raise TypeError("expected zero knowledge proofs")
-            self._verify_zkp(g, remote_gx1, remote_zkp_x1)
-            self._verify_zkp(g, remote_gx2, remote_zkp_x2)
+            self._check_replay(
+                (remote_gx1, remote_zkp_x1), (remote_gx2, remote_zkp_x2),
+            )
+            g_table = self._generator_table()
+            self._verify_zkp(g, remote_gx1, remote_zkp_x1, table=g_table)
+            self._verify_zkp(g, remote_gx2, remote_zkp_x2, table=g_table)
 
         self._remote_gx1 = remote_gx1
         self._remote_gx2 = remote_gx2
 
         self._remote_zkp_x1 = remote_zkp_x1
         self._remote_zkp_x2 = remote_zkp_x2
+        self._remote_zkp_x1_x2 = remote_zkp_x1_x2
 
         self.waiting_one = False
 
+        self._schedule_two()
+
     def _compute_two(self):
         if self.waiting_one:
             raise OutOfSequenceError(
@@ -485,6 +795,7 @@ class JPAKE(object):
             )
 
         p = self.p
+        q = self.q
 
         remote_gx1 = self.remote_gx1
         remote_gx2 = self.remote_gx2
@@ -492,18 +803,52 @@ class JPAKE(object):
         # A = g^((x1+x3+x4)*x2*s)
         #   = (g^x1*g^x3*g^x4)^(x2*s)
         t1 = (((self.gx1 * remote_gx1) % p) * remote_gx2) % p
-        t2 = (self.x2 * self.secret) % p
+        t2 = (self.x2 * self.secret) % q
+
+        # ``t1`` is raised to a power twice, once here and once for the proof
+        # commitment, so it is worth precomputing a table.
+        t1_table = FixedBaseTable(
+            t1, p, bits=q.bit_length(), window=self._tuning.session_window,
+        )
 
-        A = pow(t1, t2, p)
+        A = t1_table.pow(t2)
 
         # zero knowledge proof for ``x2*s``
-        zkp_A = self._zkp(t1, t2, A)
+        zkp_A = self._zkp(t1, t2, A, table=t1_table)
 
         self._A = A
         self._zkp_A = MappingProxyType(zkp_A)
 
+    def _schedule_two(self):
+        if self._executor is None:
+            return
+        if self.waiting_one or self.waiting_secret:
+            return
+        if not hasattr(self, '_gx2'):
+            # Step two depends on the results of step one.  Compute them
+            # here rather than letting the background task do it, so that
+            # they can't be computed twice, with different proofs, if
+            # ``one()`` is called at the same time.
+            self._compute_one()
+        self._pending_two = self._executor.submit(self._compute_two)
+
+    def _finish_two(self):
+        """
+        Makes sure that the results of step two are available, waiting for
+        them if they are being computed in the background.
+        """
+        pending, self._pending_two = self._pending_two, None
+        if pending is not None:
+            # Re-raises anything raised by ``_compute_two``.
+            pending.result()
+        if not hasattr(self, '_zkp_A'):
+            self._compute_two()
+
     def two(self):
-        self._compute_two()
+        if self._executor is None:
+            self._compute_two()
+        else:
+            self._finish_two()
         return {
             'A': self.A,
             'zkp_A': dict(self.zkp_A),
@@ -536,6 +881,9 @@ class JPAKE(object):
             If called more than once or before ``process_one``.
         :raises InvalidProofError:
             If verification is enabled and either of the proofs fail.
+        :raises ReplayedProofError:
+            If verification is enabled and the proof has already been seen by
+            the replay cache.
         """
         p = self.p
 
@@ -552,6 +900,7 @@ class JPAKE(object):
             remote_zkp_A = data['zkp_A']
 
         if verify:
+            self._check_replay((remote_A, remote_zkp_A))
             generator = (((self.gx1*self.gx2) % p) * self.remote_gx1) % p
             self._verify_zkp(generator, remote_A, remote_zkp_A)
 
@@ -560,6 +909,64 @@ class JPAKE(object):
 
         self.waiting_two = False
 
+        if self._executor is not None:
+            self._pending_three = self._executor.submit(self._compute_three)
+
+    def transcript(self):
+        """
+        Returns a dictionary of the public values exchanged so far, suitable
+        for writing to an audit log with
+        :class:`~jpake.transcript.TranscriptWriter`.
+
+        Only values that have already been computed or received are
+        included.  The private values ``x1``, ``x2``, the secret and ``K``
+        never are.
+
+        :raises OutOfSequenceError:
+            If called before ``process_one``.
+        """
+        if self.waiting_one:
+            raise OutOfSequenceError(
+                "nothing to record before step one has been processed"
+            )
+
+        transcript = {
+            'p': self.p,
+            'q': self.q,
+            'g': self.g,
+            'signer_id': self.signer_id,
+            'remote_gx1': self.remote_gx1,
+            'remote_gx2': self.remote_gx2,
+        }
+
+        for name in ('gx1', 'gx2', 'A', 'remote_A'):
+            value = getattr(self, '_' + name, None)
+            if value is not None:
+                transcript[name] = value
+
+        for name in (
+            'zkp_x1', 'zkp_x2', 'zkp_x1_x2', 'zkp_A',
+            'remote_zkp_x1', 'remote_zkp_x2', 'remote_zkp_x1_x2',
+            'remote_zkp_A',
+        ):
+            value = getattr(self, '_' + name, None)
+            if value is not None:
+                transcript[name] = dict(value)
+
+        return transcript
+
+    def _finish_three(self):
+        """
+        Makes sure that ``K`` is available, waiting for it if it is being
+        computed in the background.
+        """
+        pending, self._pending_three = self._pending_three, None
+        if pending is not None:
+            # Re-raises anything raised by ``_compute_three``.
+            pending.result()
+        if not hasattr(self, '_K'):
+            self._compute_three()
+
     def _compute_three(self):
         if self.waiting_two:
             raise OutOfSequenceError(
@@ -569,16 +976,17 @@ class JPAKE(object):
         p = self.p
         q = self.q
 
-        # t3 = g^-(x4*x2*s)
-        #    = (g^x4)^(x2*-s)
-        bottom = pow(self.remote_gx2, self.x2 * (q - self.secret), p)
-
-        # t4 = B/(g^(x4*x2*s))
-        #    = B*t3
-        inner = (self.remote_A * bottom) % p
+        x2 = self.x2
 
         # K = (B/(g^(x4*x2*s)))^x2
-        K = pow(inner, self.x2, p)
+        #   = B^x2 * (g^x4)^(-x2*x2*s)
+        #
+        # Both bases are in the order q subgroup so the exponents can be
+        # reduced mod q and the two powers computed together.
+        K = multi_pow((
+            (self.remote_A, x2 % q),
+            (self.remote_gx2, (-x2 * x2 * self.secret) % q),
+        ), p, window=self._tuning.multi_window)
 
         # TODO Key derivation function is necessary to avoid exposing K but the
         # spec does not fix one and the choice of function depends on the
@@ -587,4 +995,18 @@ class JPAKE(object):
         self._K = K
 
 
-__all__ = ['NIST_80', 'NIST_112', 'NIST_128', 'JPAKE']
+def __getattr__(name):
+    # Re-exported lazily so that importing ``jpake`` doesn't import the
+    # modules that define them.
+    if name == 'ReplayCache':
+        from jpake.cache import ReplayCache
+        return ReplayCache
+    if name == 'Tuning':
+        from jpake.tuning import Tuning
+        return Tuning
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+__all__ = [
+    'NIST_80', 'NIST_112', 'NIST_128', 'JPAKE', 'ReplayCache', 'Tuning',
+]
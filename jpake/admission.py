@@ -0,0 +1,253 @@
+"""
+Admission control for servers that accept more handshakes than they can
+verify.
+
+Rather than letting every new handshake queue for the CPU, an
+:class:`AdmissionController` limits how many run at once and keeps a bounded
+queue of handshakes waiting to start.  The time each step takes is measured
+as it runs, and a new handshake that would have to wait longer than
+``max_wait`` seconds for a turn is refused straight away with an
+:class:`~jpake.exceptions.OverloadedError` telling the client when to try
+again.  This keeps latency bounded for the handshakes that are accepted.
+
+Each step of a handshake takes its own turn, so a handshake between steps
+holds nothing.  The estimated cost of the work waiting in the queue is the
+sum of the costs of each waiter's steps.
+
+For example::
+
+    admission = AdmissionController(max_in_flight=4)
+    manager = SessionManager(resolver, signer_id=b"server",
+                             admission=admission)
+"""
+import asyncio
+import os
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+from jpake.exceptions import OverloadedError
+
+
+class CostEstimator(object):
+    """
+    Thread-safe exponentially weighted moving averages of the time taken by
+    named operations.
+
+    :param alpha:
+        Weight given to each new sample.
+    """
+    __slots__ = ['alpha', '_clock', '_lock', '_estimates', '_counts']
+
+    def __init__(self, *, alpha=0.2, clock=None):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in the range (0, 1]")
+
+        if clock is None:
+            clock = time.perf_counter
+
+        self.alpha = alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._estimates = {}
+        self._counts = {}
+
+    def record(self, name, seconds):
+        """Adds a sample for operation ``name``."""
+        with self._lock:
+            estimate = self._estimates.get(name)
+            if estimate is None:
+                estimate = seconds
+            else:
+                estimate += self.alpha * (seconds - estimate)
+            self._estimates[name] = estimate
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    @contextmanager
+    def measure(self, name):
+        """Context manager that records how long its body takes to run as a
+        sample for ``name``.  Nothing is recorded if the body raises.
+        """
+        start = self._clock()
+        yield
+        self.record(name, self._clock() - start)
+
+    def estimate(self, name):
+        """Returns the current estimate, in seconds, for ``name``, or zero if
+        it has not been measured yet.
+        """
+        with self._lock:
+            return self._estimates.get(name, 0.0)
+
+    def as_dict(self):
+        """Returns a mapping from operation names to ``(estimate, count)``
+        tuples.
+        """
+        with self._lock:
+            return {
+                name: (estimate, self._counts[name])
+                for name, estimate in self._estimates.items()
+            }
+
+
+class AdmissionController(object):
+    """
+    Limits the number of handshakes being processed at once.
+
+    Use as an async context manager around the work to be limited::
+
+        async with admission:
+            ...
+
+    Entering the context either starts immediately, waits for a turn, or
+    raises :class:`~jpake.exceptions.OverloadedError`.  Instances must only
+    be used from a single event loop.
+
+    :param max_in_flight:
+        Number of handshakes that may be processed at once.  Defaults to the
+        number of CPUs.
+    :param max_queue:
+        Number of handshakes that may wait for a turn.  Defaults to four
+        times ``max_in_flight``.
+    :param max_wait:
+        Handshakes that are estimated to have to wait longer than this many
+        seconds for a turn are refused.
+    :param steps:
+        Names of the operations, as recorded in :attr:`costs`, that make up
+        the work done while holding a turn, unless other steps are passed to
+        :meth:`acquire`.
+    :param costs:
+        A :class:`CostEstimator` to share measurements with.
+    """
+    __slots__ = [
+        'max_in_flight', 'max_queue', 'max_wait', 'steps', 'costs',
+        '_in_flight', '_waiters', 'admitted', 'deferred', 'shed',
+    ]
+
+    def __init__(
+        self, *, max_in_flight=None, max_queue=None, max_wait=1.0,
+        steps=('verify_one', 'compute_one'), costs=None
+    ):
+        if max_in_flight is None:
+            max_in_flight = os.cpu_count() or 1
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be positive")
+
+        if max_queue is None:
+            max_queue = 4 * max_in_flight
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+
+        if costs is None:
+            costs = CostEstimator()
+
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.steps = tuple(steps)
+        self.costs = costs
+
+        self._in_flight = 0
+        self._waiters = deque()
+
+        self.admitted = 0
+        self.deferred = 0
+        self.shed = 0
+
+    @property
+    def in_flight(self):
+        """Number of handshakes currently holding a turn."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self):
+        """Number of handshakes waiting for a turn."""
+        return len(self._waiters)
+
+    def cost(self, steps=None):
+        """Returns the estimated time, in seconds, for which a turn is held
+        while running ``steps``, which defaults to :attr:`steps`.
+        """
+        if steps is None:
+            steps = self.steps
+        return sum(self.costs.estimate(step) for step in steps)
+
+    def estimated_wait(self, steps=None):
+        """Returns the estimated time, in seconds, that a handshake arriving
+        now to run ``steps`` would have to wait for a turn.
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            return 0.0
+        queued = sum(cost for _, cost in self._waiters)
+        return (queued + self.cost(steps)) / self.max_in_flight
+
+    def stats(self):
+        """Returns a dictionary of counters suitable for export as metrics.
+        """
+        return {
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'admitted': self.admitted,
+            'deferred': self.deferred,
+            'shed': self.shed,
+            'cost': self.cost(),
+        }
+
+    async def acquire(self, steps=None):
+        """
+        Waits for a turn.  Every successful call must be matched by a call to
+        :meth:`release`.
+
+        :param steps:
+            Names of the operations that will be run while holding the turn.
+            Defaults to :attr:`steps`.
+        :raises OverloadedError:
+            If the queue is full or the wait would be too long.
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+
+        cost = self.cost(steps)
+        wait = self.estimated_wait(steps)
+        if len(self._waiters) >= self.max_queue or wait > self.max_wait:
+            self.shed += 1
+            raise OverloadedError(retry_after=max(wait, cost))
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, cost)
+        self._waiters.append(entry)
+        self.deferred += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                # :meth:`release` may already have discarded the entry
+                # while skipping over cancelled waiters.
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+            else:
+                # Handed a turn at the same time as being cancelled.  Pass
+                # it on.
+                self.release()
+            raise
+        self.admitted += 1
+
+    def release(self):
+        """Gives up a turn, handing it to the next waiting handshake."""
+        while self._waiters:
+            waiter, _ = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,139 @@
+"""
+Operations that amortise the cost of exponentiation over many proofs or
+sessions at once.
+"""
+from jpake.exponentiation import (
+    DEFAULT_BATCH_WINDOW, DEFAULT_MULTI_WINDOW, DEFAULT_TABLE_WINDOW,
+    FixedBaseTable, multi_pow,
+)
+from jpake.exceptions import InvalidProofError
+
+
+def verify_zkps(
+    statements, *, p, zkp_hash, window=DEFAULT_MULTI_WINDOW,
+    table_window=DEFAULT_TABLE_WINDOW, tables=None
+):
+    """
+    Verifies many proofs of the form produced by ``JPAKE._zkp``, sharing a
+    :class:`~jpake.exponentiation.FixedBaseTable` between all of the proofs
+    for each generator that is used by more than one of them.
+
+    Every proof is still checked on its own, exactly as by ``JPAKE``.  A
+    small exponent batch test, which checks a random linear combination of
+    the proofs instead, is not sound for these parameter sets: they are
+    subgroups of order ``q`` of a much larger group, and a prover is free to
+    send commitments with a component of small order that the random weights
+    cancel out.
+
+    :param statements:
+        A sequence of ``(generator, gx, zkp)`` tuples, where ``zkp`` is a
+        mapping with ``gr``, ``b`` and ``id`` keys.
+    :param p:
+        The modulus.
+    :param zkp_hash:
+        The hash function used to compute each proof's challenge.
+    :param tables:
+        An optional dictionary mapping generators to tables of their powers.
+        Tables for generators that are not already present are added to it,
+        so that they can be reused by later calls.
+
+    :raises InvalidProofError:
+        If any of the proofs are invalid.
+    """
+    if tables is None:
+        tables = {}
+
+    statements = list(statements)
+
+    # Number of statements and bit length of the largest response for each
+    # generator.
+    counts = {}
+    bits = {}
+    for generator, _, zkp in statements:
+        counts[generator] = counts.get(generator, 0) + 1
+        bits[generator] = max(
+            bits.get(generator, 0), abs(zkp['b']).bit_length(),
+        )
+
+    for generator, gx, zkp in statements:
+        gr = zkp['gr']
+        if not 0 <= gr < p:
+            # Would never compare equal to a reduced value.
+            raise InvalidProofError()
+
+        table = tables.get(generator)
+        if table is None and counts[generator] > 1:
+            table = tables[generator] = FixedBaseTable(
+                generator, p, bits=bits[generator], window=table_window,
+            )
+
+        h = zkp_hash(g=generator, gr=gr, gx=gx, signer_id=zkp['id'])
+        if table is None:
+            expected = multi_pow(
+                ((generator, zkp['b']), (gx, h)), p, window=window,
+            )
+        else:
+            expected = (
+                table.pow(zkp['b']) * multi_pow(((gx, h),), p, window=window)
+            ) % p
+        if gr != expected:
+            raise InvalidProofError()
+
+
+def batch_one(sessions, *, window=DEFAULT_BATCH_WINDOW):
+    """
+    Computes the results of step one for many :class:`~jpake.JPAKE` sessions
+    at once, so that subsequent calls to ``one()`` return immediately.
+
+    All of the powers of the generator needed by sessions sharing a parameter
+    set are computed together from a single
+    :class:`~jpake.exponentiation.FullFixedBaseTable`, which is built on
+    first use and then kept for the life of the parameter set.
+
+    :param sessions:
+        An iterable of :class:`~jpake.JPAKE` instances.
+    :param window:
+        The window size of the shared table.  Larger windows make each
+        exponentiation cheaper but the table exponentially larger.
+    """
+    groups = {}
+    for session in sessions:
+        groups.setdefault(id(session._parameters), []).append(session)
+
+    for group in groups.values():
+        parameters = group[0]._parameters
+        g = parameters.g
+        table = parameters.generator_table(window, full=True)
+
+        exponents = []
+        for session in group:
+            exponents.extend((session.x1, session.x2))
+        gxs = table.pow_many(exponents)
+
+        # Nonces are drawn only once the values they prove knowledge of are
+        # known, so that they can be derived from them.  Sessions in compact
+        # mode need one, other sessions two.
+        nonces = []
+        for session, gx1, gx2 in zip(group, gxs[0::2], gxs[1::2]):
+            if session._compact:
+                nonces.append(session._compact_nonce(gx1, gx2))
+            else:
+                nonces.append(session._zkp_nonce(g, session.x1, gx1))
+                nonces.append(session._zkp_nonce(g, session.x2, gx2))
+        commitments = iter(zip(nonces, table.pow_many(nonces)))
+
+        for session, gx1, gx2 in zip(group, gxs[0::2], gxs[1::2]):
+            if session._compact:
+                r, gr = next(commitments)
+                session._set_compact_one(
+                    gx1, gx2, session._compact_zkp_response(gx1, gx2, r, gr),
+                )
+                continue
+
+            r1, gr1 = next(commitments)
+            r2, gr2 = next(commitments)
+            session._set_one(
+                gx1, gx2,
+                session._zkp_response(g, session.x1, gx1, r1, gr1),
+                session._zkp_response(g, session.x2, gx2, r2, gr2),
+            )
@@ -0,0 +1,192 @@
+"""
+Bounded caches that can be shared between many :class:`jpake.JPAKE`
+instances.
+"""
+import threading
+import time
+
+from collections import OrderedDict
+from hashlib import sha256
+
+
+def _pascal(num):
+    bs = num.to_bytes((num.bit_length() // 8) + 1, byteorder='big')
+    return len(bs).to_bytes(4, 'big') + bs
+
+
+def proof_digest(gx, zkp, *, p, q):
+    """
+    Returns a short digest identifying the proof ``zkp`` of knowledge of the
+    discrete log of ``gx``.  For a single proof covering several values, such
+    as the combined proof of compact mode, pass a tuple of the values as
+    ``gx``.
+
+    ``gr`` and ``b`` are normalised mod ``p`` and ``q`` respectively so that
+    trivial variations of a replayed proof map to the same digest.
+    """
+    if not isinstance(gx, tuple):
+        gx = (gx,)
+    signer_id = zkp['id']
+    return sha256(b"".join((
+        len(gx).to_bytes(4, 'big'),
+        b"".join(_pascal(value % p) for value in gx),
+        _pascal(zkp['gr'] % p),
+        _pascal(zkp['b'] % q),
+        len(signer_id).to_bytes(4, 'big') + signer_id,
+    ))).digest()
+
+
+class _ExpiringCache(object):
+    """
+    Thread-safe mapping that forgets entries once they are older than ``ttl``
+    seconds or, least recently used first, once more than ``max_entries`` are
+    held.
+    """
+    __slots__ = [
+        'max_entries', 'ttl', '_clock', '_lock', '_entries',
+        'hits', 'misses',
+    ]
+
+    def __init__(self, *, max_entries, ttl, clock=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+
+        if clock is None:
+            clock = time.monotonic
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # Maps keys to ``(expires, value)`` tuples, least recently used
+        # first.
+        self._entries = OrderedDict()
+
+        #: The number of lookups that found an entry in the cache.
+        self.hits = 0
+
+        #: The number of lookups that did not find an entry in the cache.
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, now):
+        entries = self._entries
+        while entries:
+            key, (expires, _) = next(iter(entries.items()))
+            if expires > now and len(entries) <= self.max_entries:
+                break
+            del entries[key]
+
+    def _lookup(self, key, now):
+        """Returns the entry for ``key`` and updates the counters.  Must be
+        called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= now:
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def _insert(self, key, value, now):
+        """Must be called with the lock held."""
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        self._expire(now)
+
+    def clear(self):
+        """Forgets all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class ReplayCache(_ExpiringCache):
+    """
+    Remembers the digests of recently verified proofs so that a repeated
+    proof can be rejected before any exponentiation is done.
+
+    Entries are forgotten once they are older than ``ttl`` seconds or, least
+    recently seen first, once more than ``max_entries`` are held.  Each entry
+    costs roughly 200 bytes, so the default limit keeps the cache to around
+    13MB.
+
+    A single cache can safely be shared between threads.
+
+    :param max_entries:
+        The maximum number of proof digests to remember.
+    :param ttl:
+        The number of seconds for which a digest is remembered.
+    :param clock:
+        A function returning the current time in seconds.  Defaults to
+        :func:`time.monotonic`.
+    """
+    __slots__ = []
+
+    def __init__(self, *, max_entries=65536, ttl=300.0, clock=None):
+        super().__init__(max_entries=max_entries, ttl=ttl, clock=clock)
+
+    def seen(self, digest):
+        """
+        Returns ``True`` if ``digest`` has been recorded within the last
+        ``ttl`` seconds, otherwise records it and returns ``False``.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._lookup(digest, now) is not None:
+                return True
+            self._insert(digest, None, now)
+            return False
+
+
+class SecretCache(_ExpiringCache):
+    """
+    Holds secrets derived from passwords so that repeat logins can skip both
+    the lookup of the password and the key derivation function.
+
+    Entries are forgotten once they are older than ``ttl`` seconds or, least
+    recently used first, once more than ``max_entries`` are held.
+
+    A single cache can safely be shared between threads.
+
+    :param max_entries:
+        The maximum number of secrets to hold.
+    :param ttl:
+        The number of seconds for which a secret is held.  This bounds how
+        long a changed password can continue to be accepted.
+    :param clock:
+        A function returning the current time in seconds.  Defaults to
+        :func:`time.monotonic`.
+    """
+    __slots__ = []
+
+    def __init__(self, *, max_entries=4096, ttl=600.0, clock=None):
+        super().__init__(max_entries=max_entries, ttl=ttl, clock=clock)
+
+    def get(self, key, default=None):
+        """Returns the secret stored under ``key``, or ``default``."""
+        with self._lock:
+            entry = self._lookup(key, self._clock())
+        if entry is None:
+            return default
+        return entry[1]
+
+    def put(self, key, secret):
+        """Stores ``secret`` under ``key``."""
+        with self._lock:
+            self._insert(key, secret, self._clock())
+
+    def invalidate(self, key):
+        """Forgets the secret stored under ``key``, if there is one."""
+        with self._lock:
+            self._entries.pop(key, None)
@@ -0,0 +1,207 @@
+"""
+Instrumented integer arithmetic for deterministic performance tests.
+
+Wall clock benchmarks are too noisy to reliably catch small regressions,
+such as an extra exponentiation or an exponent that is no longer reduced.
+Instead, the parameters of a :class:`~jpake.JPAKE` session can be replaced
+with :class:`CountingInt` values, which record each multiplication,
+squaring, reduction and call to ``pow`` that they take part in.  Wrapping
+the proof hash with :func:`counting_hash` counts hash invocations too::
+
+    parameters = counting_parameters(NIST_128)
+    counter = OperationCounter()
+
+    alice = JPAKE(parameters=parameters,
+                  zkp_hash_function=counting_hash(), ...)
+    with counter.count('one'):
+        alice.one()
+
+    counter['one'].mul
+
+Operations are only counted while a :meth:`OperationCounter.count` block is
+active in the current thread, so work done in an executor, for example by a
+session created with ``executor=...``, is not recorded.
+"""
+import threading
+
+from contextlib import contextmanager
+
+from jpake import _default_zkp_hash_fn
+from jpake.parameters import Parameters
+
+
+_state = threading.local()
+
+
+def _active():
+    return getattr(_state, 'counts', None)
+
+
+class OperationCounts(object):
+    """
+    Number of each kind of operation performed during a step.
+
+    .. attribute:: mul
+
+        Multiplications of two distinct values.
+
+    .. attribute:: sqr
+
+        Multiplications of a value by itself.
+
+    .. attribute:: mod
+
+        Reductions.
+
+    .. attribute:: pow
+
+        Calls to ``pow``.
+
+    .. attribute:: pow_bits
+
+        Total bit length of the exponents passed to ``pow``.  Each bit costs
+        roughly one squaring.
+
+    .. attribute:: hash
+
+        Calls to a hash function wrapped with :func:`counting_hash`.
+    """
+    __slots__ = ['mul', 'sqr', 'mod', 'pow', 'pow_bits', 'hash']
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return "OperationCounts(%s)" % ", ".join(
+            "%s=%d" % (name, getattr(self, name)) for name in self.__slots__
+        )
+
+
+class CountingInt(int):
+    """
+    An ``int`` that records the operations it takes part in with the active
+    :class:`OperationCounter`.
+
+    The results of multiplication, reduction and exponentiation are also
+    :class:`CountingInt` instances, so that values derived from the
+    parameters continue to be counted.
+    """
+    __slots__ = []
+
+    def __mul__(self, other):
+        result = int.__mul__(self, other)
+        if result is NotImplemented:
+            return result
+        counts = _active()
+        if counts is not None:
+            if other is self:
+                counts.sqr += 1
+            else:
+                counts.mul += 1
+        return CountingInt(result)
+
+    def __rmul__(self, other):
+        result = int.__rmul__(self, other)
+        if result is NotImplemented:
+            return result
+        counts = _active()
+        if counts is not None:
+            counts.mul += 1
+        return CountingInt(result)
+
+    def __mod__(self, other):
+        result = int.__mod__(self, other)
+        if result is NotImplemented:
+            return result
+        counts = _active()
+        if counts is not None:
+            counts.mod += 1
+        return CountingInt(result)
+
+    def __rmod__(self, other):
+        result = int.__rmod__(self, other)
+        if result is NotImplemented:
+            return result
+        counts = _active()
+        if counts is not None:
+            counts.mod += 1
+        return CountingInt(result)
+
+    def __pow__(self, exponent, modulus=None):
+        result = int.__pow__(self, exponent, modulus)
+        if result is NotImplemented:
+            return result
+        counts = _active()
+        if counts is not None:
+            counts.pow += 1
+            counts.pow_bits += abs(exponent).bit_length()
+        return CountingInt(result)
+
+
+def counting_parameters(parameters):
+    """
+    Returns a copy of ``parameters`` whose values are :class:`CountingInt`
+    instances.
+    """
+    return Parameters(
+        p=CountingInt(parameters.p),
+        q=CountingInt(parameters.q),
+        g=CountingInt(parameters.g),
+    )
+
+
+def counting_hash(hash_fn=None):
+    """
+    Wraps a zero knowledge proof hash function, by default the one used by
+    :class:`~jpake.JPAKE`, so that each call is counted.
+    """
+    if hash_fn is None:
+        hash_fn = _default_zkp_hash_fn
+
+    def counted(**kwargs):
+        counts = _active()
+        if counts is not None:
+            counts.hash += 1
+        return hash_fn(**kwargs)
+    return counted
+
+
+class OperationCounter(object):
+    """
+    Collects :class:`OperationCounts` for named steps.
+    """
+    __slots__ = ['_steps']
+
+    def __init__(self):
+        self._steps = {}
+
+    @contextmanager
+    def count(self, step):
+        """
+        Context manager that adds the operations performed by its body, in
+        the current thread, to the counts for ``step``.
+        """
+        counts = self._steps.get(step)
+        if counts is None:
+            counts = self._steps[step] = OperationCounts()
+
+        previous = _active()
+        _state.counts = counts
+        try:
+            yield counts
+        finally:
+            _state.counts = previous
+
+    def __getitem__(self, step):
+        return self._steps[step]
+
+    def __contains__(self, step):
+        return step in self._steps
+
+    def steps(self):
+        """Returns the names of the steps counted so far."""
+        return list(self._steps)
@@ -15,3 +15,38 @@ class DuplicateSignerError(InvalidProofError):
 
 class OutOfSequenceError(Exception):
     pass
+
+
+class ReplayedProofError(InvalidProofError):
+    """Raised when a proof has already been seen by a :class:`ReplayCache`.
+    """
+
+
+class MismatchedKeyError(Exception):
+    """Raised when the parties to a key agreement have arrived at different
+    keys, most likely because they were not using the same secret.
+    """
+
+
+class OverloadedError(Exception):
+    """Raised when a new handshake is turned away because the server is over
+    capacity.  The client should try again after ``retry_after`` seconds.
+    """
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return "overloaded, retry after %.3fs" % self.retry_after
+
+
+class InvalidTicketError(Exception):
+    """Raised when a resumption ticket can not be used, because it has been
+    tampered with, has expired, was issued under a key that has since been
+    retired, or has already been used.
+    """
+
+
+class CorruptTranscriptError(Exception):
+    """Raised when a transcript log can not be read, because it has been
+    truncated or modified, or is not a transcript log at all.
+    """
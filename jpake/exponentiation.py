@@ -0,0 +1,234 @@
+"""
+Modular exponentiation routines that do better than the builtin ``pow`` when
+the same base is raised to several exponents, or when a product of several
+powers is needed.
+
+All are built from plain python integer arithmetic so the individual
+multiplications are still done by the interpreter's big integer
+implementation; the savings come from doing fewer of them.
+"""
+
+#: Default window width, in bits, for :class:`FixedBaseTable`.
+DEFAULT_TABLE_WINDOW = 4
+
+#: Default window width, in bits, for :func:`multi_pow`.
+DEFAULT_MULTI_WINDOW = 4
+
+#: Default window width, in bits, for :class:`FullFixedBaseTable`.
+DEFAULT_BATCH_WINDOW = 6
+
+
+class FixedBaseTable(object):
+    """
+    Precomputed powers of a single base that make subsequent exponentiations
+    by exponents of up to ``bits`` bits cheap.
+
+    Stores :math:`base^{2^{wi}}` for every window ``i`` and evaluates powers
+    using Yao's method, which needs no squarings and roughly
+    ``bits / window + 2^window`` multiplications per exponentiation.  Building
+    the table costs about as much as a single call to ``pow`` so it pays for
+    itself from the second exponentiation onwards.
+
+    :param base:
+        The value to be raised to a power.
+    :param p:
+        The modulus.
+    :param bits:
+        The maximum bit length of exponents that the table should support.
+        Larger or negative exponents fall back to the builtin ``pow``.
+    :param window:
+        The number of exponent bits consumed per table entry.
+    """
+    __slots__ = ['base', 'p', 'bits', 'window', '_powers']
+
+    def __init__(self, base, p, *, bits, window=DEFAULT_TABLE_WINDOW):
+        if window < 1:
+            raise ValueError("window must be at least one bit")
+
+        self.base = base % p
+        self.p = p
+        self.bits = bits
+        self.window = window
+
+        step = 1 << window
+        powers = []
+        power = self.base
+        for _ in range(-(-bits // window)):
+            powers.append(power)
+            power = pow(power, step, p)
+        self._powers = powers
+
+    def pow(self, exponent):
+        """Returns :math:`base^{exponent} mod p`."""
+        p = self.p
+        window = self.window
+
+        if exponent < 0 or exponent.bit_length() > self.bits:
+            return pow(self.base, exponent, p)
+
+        # Multiply together the table entries for each digit value.
+        mask = (1 << window) - 1
+        buckets = [None] * (mask + 1)
+        for power in self._powers:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                bucket = buckets[digit]
+                buckets[digit] = (
+                    power if bucket is None else (bucket * power) % p
+                )
+            exponent >>= window
+
+        # Raise each bucket to the power of its digit by accumulating from the
+        # largest digit down.
+        result = 1
+        accumulator = 1
+        for digit in range(mask, 0, -1):
+            bucket = buckets[digit]
+            if bucket is not None:
+                accumulator = (accumulator * bucket) % p
+            if accumulator != 1:
+                result = (result * accumulator) % p
+        return result
+
+
+def _sliding_windows(exponent, window):
+    """
+    Splits ``exponent`` into a list of ``(position, digit)`` pairs, where each
+    digit is odd and less than ``2^window``, such that
+    :math:`exponent = \\sum digit 2^{position}`.
+    """
+    windows = []
+    position = 0
+    mask = (1 << window) - 1
+    while exponent:
+        if exponent & 1:
+            windows.append((position, exponent & mask))
+            exponent >>= window
+            position += window
+        else:
+            exponent >>= 1
+            position += 1
+    return windows
+
+
+def multi_pow(pairs, p, *, window=DEFAULT_MULTI_WINDOW):
+    """
+    Returns :math:`\\prod base^{exponent} mod p` for a sequence of
+    ``(base, exponent)`` pairs.
+
+    Uses interleaved sliding window exponentiation so that a single chain of
+    squarings, as long as the longest exponent, is shared between all of the
+    bases.
+
+    Negative exponents are allowed if ``p`` is prime.
+    """
+    if window < 1:
+        raise ValueError("window must be at least one bit")
+
+    schedule = {}
+    top = -1
+    for base, exponent in pairs:
+        if exponent < 0:
+            # ``p`` is prime, so by Fermat's little theorem this is the
+            # inverse of ``base``.
+            base = pow(base, p - 2, p)
+            exponent = -exponent
+
+        windows = _sliding_windows(exponent, window)
+        if not windows:
+            continue
+
+        # Odd powers of the base, up to the largest digit that is needed.
+        largest = max(digit for _, digit in windows)
+        odd_powers = [base % p]
+        if largest > 1:
+            square = (base * base) % p
+            for _ in range(largest >> 1):
+                odd_powers.append((odd_powers[-1] * square) % p)
+
+        for position, digit in windows:
+            schedule.setdefault(position, []).append(odd_powers[digit >> 1])
+        top = max(top, windows[-1][0])
+
+    result = 1
+    for position in range(top, -1, -1):
+        if result != 1:
+            result = (result * result) % p
+        for factor in schedule.get(position, ()):
+            result = (result * factor) % p
+    return result % p
+
+
+class FullFixedBaseTable(object):
+    """
+    Precomputed powers of a single base, with an entry for every possible
+    digit value in every window, for evaluating large batches of powers of
+    the same base.
+
+    Stores :math:`base^{d 2^{wi}}` for every window ``i`` and every non-zero
+    digit ``d``, so that each exponentiation needs only one multiplication per
+    non-zero digit of the exponent.  The table holds ``2^window - 1`` times
+    as many entries as a :class:`FixedBaseTable` with the same window and is
+    correspondingly more expensive to build, so it is only worth using when
+    the cost can be spread over many exponentiations.
+
+    :param base:
+        The value to be raised to a power.
+    :param p:
+        The modulus.
+    :param bits:
+        The maximum bit length of exponents that the table should support.
+        Larger or negative exponents fall back to the builtin ``pow``.
+    :param window:
+        The number of exponent bits consumed per table row.
+    """
+    __slots__ = ['base', 'p', 'bits', 'window', '_rows']
+
+    def __init__(self, base, p, *, bits, window=DEFAULT_BATCH_WINDOW):
+        if window < 1:
+            raise ValueError("window must be at least one bit")
+
+        self.base = base % p
+        self.p = p
+        self.bits = bits
+        self.window = window
+
+        rows = []
+        power = self.base
+        for _ in range(-(-bits // window)):
+            # ``row[d]`` holds ``power^d``.  Index zero is unused.
+            row = [1, power]
+            for _ in range((1 << window) - 2):
+                row.append((row[-1] * power) % p)
+            rows.append(row)
+            power = (row[-1] * power) % p
+        self._rows = rows
+
+    def pow(self, exponent):
+        """Returns :math:`base^{exponent} mod p`."""
+        p = self.p
+        window = self.window
+
+        if exponent < 0 or exponent.bit_length() > self.bits:
+            return pow(self.base, exponent, p)
+
+        mask = (1 << window) - 1
+        result = None
+        for row in self._rows:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                if result is None:
+                    result = row[digit]
+                else:
+                    result = (result * row[digit]) % p
+            exponent >>= window
+        return 1 if result is None else result
+
+    def pow_many(self, exponents):
+        """Returns a list of :math:`base^{e} mod p` for each ``e`` in
+        ``exponents``."""
+        return [self.pow(exponent) for exponent in exponents]
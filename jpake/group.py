@@ -0,0 +1,384 @@
+"""
+Password authenticated group key agreement built from J-PAKE.
+
+Members are arranged in a ring, ordered by signer id.  Each member:
+
+1. broadcasts a J-PAKE step one message carrying a single :math:`g^{x1}`
+   and separate :math:`g^{x2}` values for its left and right neighbours,
+   which every other member verifies using the shared table of powers of
+   the generator,
+2. runs J-PAKE step two with its two neighbours in the ring only, each using
+   the :math:`g^{x2}` meant for it, to agree pairwise keys
+   :math:`K_{i,i+1}`,
+3. broadcasts :math:`X_i = K_{i,i+1} / K_{i-1,i}`.
+
+Only :math:`x1` is shared between the two neighbour sessions.  If
+:math:`x2` were shared too, the ratio of the two step two values would
+depend only on the password and on values known to whoever sent both
+neighbours' step one messages, allowing an outsider to test guesses offline.
+
+Following Burmester and Desmedt every member can then compute every
+pairwise key around the ring by multiplication alone, and takes their
+product as the group key.  Each member performs a constant number of
+exponentiations for steps two and three regardless of the size of the
+group, compared to :math:`N - 1` complete handshakes if every pair of members
+ran J-PAKE separately.
+"""
+from random import SystemRandom
+
+from jpake import JPAKE, _default_zkp_hash_fn
+from jpake.batch import verify_zkps
+from jpake.parameters import NIST_128
+from jpake.tuning import get_tuning
+from jpake.exceptions import (
+    DuplicateSignerError, InvalidProofError, OutOfSequenceError,
+    MismatchedKeyError,
+)
+
+
+_SIDES = ('left', 'right')
+
+
+class JPAKEGroup(object):
+    """
+    One member of a group of two or more parties that share a secret.
+
+    :param secret:
+        The secret shared by all members of the group.
+    :param signer_id:
+        Identifies this member.  Must be unique within the group.
+    """
+    __slots__ = [
+        '_rng', '_zkp_hash', '_tuning', '_parameters',
+        'p', 'q', 'g', 'signer_id',
+        '_sides', '_neighbours', '_members',
+        '_remote_one', '_K', '_X',
+        'waiting_one', 'waiting_two', 'waiting_three',
+    ]
+
+    def __init__(
+        self, *, secret, signer_id,
+        parameters=NIST_128, zkp_hash_function=None, random=None,
+        tuning=None
+    ):
+        if random is None:
+            random = SystemRandom()
+        self._rng = random
+
+        if zkp_hash_function is None:
+            zkp_hash_function = _default_zkp_hash_fn
+        self._zkp_hash = zkp_hash_function
+
+        if tuning is None:
+            tuning = get_tuning(parameters)
+        self._tuning = tuning
+
+        if isinstance(signer_id, str):
+            signer_id = signer_id.encode('utf-8')
+
+        self.p = parameters.p
+        self.q = parameters.q
+        self.g = parameters.g
+        self._parameters = parameters
+
+        # This member's ends of the sessions with its left and right
+        # neighbours.  Both use the same ``x1`` but a different ``x2``.
+        x1 = random.randrange(self.q)
+        self._sides = {
+            side: JPAKE(
+                x1=x1, secret=secret, signer_id=signer_id,
+                parameters=parameters, zkp_hash_function=zkp_hash_function,
+                random=random, tuning=tuning,
+            )
+            for side in _SIDES
+        }
+        self.signer_id = signer_id
+
+        # Maps neighbour signer ids to pairwise sessions.
+        self._neighbours = {}
+
+        self.waiting_one = True
+        self.waiting_two = True
+        self.waiting_three = True
+
+    @property
+    def members(self):
+        """Signer ids of all members of the group, in ring order.
+
+        :type: tuple
+        """
+        if self.waiting_one:
+            raise AttributeError("members are not known yet")
+        return self._members
+
+    @property
+    def K(self):
+        """
+        The agreed group key.
+
+        .. warning::
+            This value is private.  Great care should be taken to make sure
+            that it is not leaked.
+
+        :type: int
+        """
+        if self.waiting_three:
+            raise AttributeError("K is not available yet")
+        return self._K
+
+    def _neighbour_ids(self, signer_id=None):
+        if signer_id is None:
+            signer_id = self.signer_id
+        members = self._members
+        index = members.index(signer_id)
+        return (
+            members[index - 1],
+            members[(index + 1) % len(members)],
+        )
+
+    def _compute_one(self):
+        left, right = self._sides['left'], self._sides['right']
+        if not hasattr(right, '_gx2'):
+            right._share_x1(left)
+        return left, right
+
+    def one(self):
+        """
+        Returns this member's step one message, to be broadcast to every
+        other member.
+        """
+        left, right = self._compute_one()
+        return {
+            'gx1': left.gx1,
+            'zkp_x1': dict(left.zkp_x1),
+            'gx2_left': left.gx2,
+            'zkp_x2_left': dict(left.zkp_x2),
+            'gx2_right': right.gx2,
+            'zkp_x2_right': dict(right.zkp_x2),
+        }
+
+    def process_one(self, messages):
+        """
+        Reads in and verifies the step one messages broadcast by every other
+        member of the group.
+
+        :param messages:
+            An iterable of the dictionaries returned by :meth:`one` on every
+            other member.
+
+        :raises OutOfSequenceError:
+            If called more than once.
+        :raises DuplicateSignerError:
+            If two members share a signer id.
+        :raises InvalidProofError:
+            If any of the proofs fail.
+        """
+        if not self.waiting_one:
+            raise OutOfSequenceError("step one already processed")
+
+        p = self.p
+        g = self.g
+
+        remote_one = {}
+        statements = []
+        for message in messages:
+            signer_id = message['zkp_x1']['id']
+            for side in _SIDES:
+                if message['zkp_x2_' + side]['id'] != signer_id:
+                    raise InvalidProofError("proofs from different signers")
+            if signer_id == self.signer_id or signer_id in remote_one:
+                raise DuplicateSignerError(signer_id)
+
+            remote_one[signer_id] = message
+            statements.append((g, message['gx1'] % p, message['zkp_x1']))
+            for side in _SIDES:
+                statements.append((
+                    g, message['gx2_' + side] % p,
+                    message['zkp_x2_' + side],
+                ))
+
+        if not remote_one:
+            raise ValueError("a group needs at least two members")
+
+        tuning = self._tuning
+        verify_zkps(
+            statements, p=p, zkp_hash=self._zkp_hash,
+            window=tuning.multi_window,
+            tables={g: self._parameters.generator_table(
+                tuning.fixed_base_window,
+            )},
+        )
+
+        self._remote_one = remote_one
+        self._members = tuple(sorted(
+            list(remote_one) + [self.signer_id]
+        ))
+
+        self._compute_one()
+        for side, signer_id in zip(_SIDES, self._neighbour_ids()):
+            if signer_id in self._neighbours:
+                # The left and right neighbours of a member of a group of
+                # two are the same.  Both ends use their left session.
+                continue
+
+            # The neighbour uses the ``x2`` for whichever side this member
+            # is on from its point of view.
+            if self._neighbour_ids(signer_id)[0] == self.signer_id:
+                remote_side = 'left'
+            else:
+                remote_side = 'right'
+
+            message = remote_one[signer_id]
+            session = self._sides[side]
+            session.process_one(
+                remote_gx1=message['gx1'],
+                remote_gx2=message['gx2_' + remote_side],
+                verify=False,
+            )
+            self._neighbours[signer_id] = session
+
+        self.waiting_one = False
+
+    def two(self):
+        """
+        Returns this member's step two message.  The message contains
+        separate values for each neighbour, but can simply be broadcast.
+
+        :raises OutOfSequenceError:
+            If called before :meth:`process_one`.
+        """
+        if self.waiting_one:
+            raise OutOfSequenceError(
+                "can't compute step two without results from one"
+            )
+        return {
+            signer_id: session.two()
+            for signer_id, session in self._neighbours.items()
+        }
+
+    def process_two(self, messages):
+        """
+        Reads in and verifies the step two messages sent by this member's
+        neighbours.  Messages from other members are ignored.
+
+        :param messages:
+            An iterable of the dictionaries returned by :meth:`two` on the
+            other members.
+
+        :raises OutOfSequenceError:
+            If called more than once or before :meth:`process_one`.
+        :raises InvalidProofError:
+            If either of the proofs fail.
+        """
+        if self.waiting_one:
+            raise OutOfSequenceError("step two cannot be processed before one")
+        if not self.waiting_two:
+            raise OutOfSequenceError("step two already processed")
+
+        p = self.p
+
+        received = {}
+        for message in messages:
+            own = message.get(self.signer_id)
+            if own is None:
+                continue
+            sender_id = own['zkp_A']['id']
+            if sender_id in self._neighbours:
+                received[sender_id] = own
+
+        missing = set(self._neighbours) - set(received)
+        if missing:
+            raise ValueError(
+                "missing step two from %s" % ", ".join(
+                    repr(signer_id) for signer_id in sorted(missing)
+                )
+            )
+
+        statements = []
+        for signer_id, session in self._neighbours.items():
+            generator = (
+                ((session.gx1 * session.gx2) % p) * session.remote_gx1
+            ) % p
+            statements.append((
+                generator, received[signer_id]['A'],
+                received[signer_id]['zkp_A'],
+            ))
+        verify_zkps(
+            statements, p=p, zkp_hash=self._zkp_hash,
+            window=self._tuning.multi_window,
+        )
+
+        for signer_id, session in self._neighbours.items():
+            session.process_two(
+                remote_A=received[signer_id]['A'], verify=False,
+            )
+
+        left_id, right_id = self._neighbour_ids()
+        left = self._neighbours[left_id].K
+        right = self._neighbours[right_id].K
+        self._X = (right * pow(left, p - 2, p)) % p
+
+        self.waiting_two = False
+
+    def three(self):
+        """
+        Returns this member's step three message, to be broadcast to every
+        other member.
+
+        :raises OutOfSequenceError:
+            If called before :meth:`process_two`.
+        """
+        if self.waiting_two:
+            raise OutOfSequenceError(
+                "can't compute step three without results from two"
+            )
+        return {'X': self._X, 'id': self.signer_id}
+
+    def process_three(self, messages):
+        """
+        Reads in the step three messages broadcast by every other member and
+        computes the group key.
+
+        :param messages:
+            An iterable of the dictionaries returned by :meth:`three` on every
+            other member.
+
+        :raises OutOfSequenceError:
+            If called more than once or before :meth:`process_two`.
+        :raises MismatchedKeyError:
+            If the pairwise keys agreed around the ring are inconsistent,
+            which will be the case if any member used a different secret.
+        """
+        if self.waiting_two:
+            raise OutOfSequenceError(
+                "step three cannot be processed before two"
+            )
+        if not self.waiting_three:
+            raise OutOfSequenceError("step three already processed")
+
+        p = self.p
+        members = self._members
+
+        X = {message['id']: message['X'] % p for message in messages}
+        X[self.signer_id] = self._X
+        if set(X) != set(members):
+            raise ValueError("expected step three from every member")
+
+        # Walk around the ring from this member's left neighbour,
+        # reconstructing each pairwise key from the last.
+        index = members.index(self.signer_id)
+        left_id, _ = self._neighbour_ids()
+        pairwise = self._neighbours[left_id].K
+        K = 1
+        for offset in range(len(members)):
+            signer_id = members[(index + offset) % len(members)]
+            pairwise = (pairwise * X[signer_id]) % p
+            K = (K * pairwise) % p
+
+        # Having gone all of the way round the ring we should arrive back at
+        # the key we started with.
+        if pairwise != self._neighbours[left_id].K:
+            raise MismatchedKeyError()
+
+        self._K = K
+        self.waiting_three = False
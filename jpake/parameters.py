@@ -1,16 +1,75 @@
+from jpake.exponentiation import (
+    DEFAULT_TABLE_WINDOW, FixedBaseTable, FullFixedBaseTable,
+)
+
+
+def _from_bytes(bs):
+    return int.from_bytes(bs, 'big')
+
+
 class Parameters(object):
+    """A group description for use with :class:`jpake.JPAKE`.
+
+    Values passed as big-endian byte strings are only converted to integers
+    the first time they are accessed so that defining a parameter set, and
+    importing the module that defines it, stays cheap.  The same goes for
+    the tables returned by :meth:`generator_table`.
+    """
+    __slots__ = ['_p', '_q', '_g', '_tables']
+
     def __init__(self, *, p, q, g):
-        if isinstance(p, bytes):
-            p = int.from_bytes(p, 'big')
-        self.p = p
+        self._p = p
+        self._q = q
+        self._g = g
+        self._tables = {}
+
+    @property
+    def p(self):
+        """The group modulus.
+
+        :type: int
+        """
+        if isinstance(self._p, bytes):
+            self._p = _from_bytes(self._p)
+        return self._p
+
+    @property
+    def q(self):
+        """The order of the subgroup generated by :attr:`g`.
+
+        :type: int
+        """
+        if isinstance(self._q, bytes):
+            self._q = _from_bytes(self._q)
+        return self._q
+
+    @property
+    def g(self):
+        """The subgroup generator.
+
+        :type: int
+        """
+        if isinstance(self._g, bytes):
+            self._g = _from_bytes(self._g)
+        return self._g
 
-        if isinstance(q, bytes):
-            q = int.from_bytes(q, 'big')
-        self.q = q
+    def generator_table(self, window=DEFAULT_TABLE_WINDOW, *, full=False):
+        """
+        Returns a :class:`~jpake.exponentiation.FixedBaseTable`, or if
+        ``full`` is set a :class:`~jpake.exponentiation.FullFixedBaseTable`,
+        for raising :attr:`g` to exponents less than :attr:`q`.
 
-        if isinstance(g, bytes):
-            g = int.from_bytes(g, 'big')
-        self.g = g
+        Tables are built on first use and shared by everything using this
+        parameter set.
+        """
+        table = self._tables.get((window, full))
+        if table is None:
+            table_class = FullFixedBaseTable if full else FixedBaseTable
+            table = table_class(
+                self.g, self.p, bits=self.q.bit_length(), window=window,
+            )
+            self._tables[(window, full)] = table
+        return table
 
 
 NIST_80 = Parameters(
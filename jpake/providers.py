@@ -0,0 +1,322 @@
+"""
+Asynchronous lookup of secrets for servers that only learn which user is
+connecting once the first message of the handshake arrives.
+
+Passwords are stretched into an exponent mod ``q`` using a memory-hard key
+derivation function, run in an executor so that it does not block the event
+loop, and the results are cached so that repeat logins skip both the lookup
+and the key derivation.
+
+Clients must derive their secret with the same function, parameters and
+salt, for example::
+
+    secret = derive_secret(password, salt=b"alice", parameters=NIST_128)
+    session = JPAKE(secret=secret, signer_id=b"alice")
+"""
+import asyncio
+import hashlib
+
+from jpake import JPAKE, _uniform_below
+from jpake.cache import SecretCache
+from jpake.parameters import NIST_128
+
+
+#: Names under which :meth:`SessionManager.start` records the time taken by
+#: each operation it runs while holding an admission turn.
+START_STEPS = ('verify_one', 'compute_one')
+
+#: Names under which :meth:`SessionManager.finish` records the time taken by
+#: each operation it runs while holding an admission turn.
+FINISH_STEPS = ('verify_two', 'compute_two', 'compute_three')
+
+
+class ScryptKDF(object):
+    """
+    Key derivation function based on :func:`hashlib.scrypt`.
+
+    The defaults use 16MB of memory and take in the order of 50ms.
+
+    :param n:
+        CPU/memory cost.  Must be a power of two.
+    :param r:
+        Block size.
+    :param p:
+        Parallelisation.
+    """
+    __slots__ = ['n', 'r', 'p']
+
+    def __init__(self, *, n=2**14, r=8, p=1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def __call__(self, password, salt, length):
+        return hashlib.scrypt(
+            password, salt=salt, n=self.n, r=self.r, p=self.p,
+            maxmem=2 * 128 * self.r * (self.n + self.p + 2), dklen=length,
+        )
+
+
+def derive_secret(password, *, salt, parameters=NIST_128, kdf=None):
+    """
+    Stretches ``password`` into a secret suitable for passing to
+    :class:`~jpake.JPAKE`.
+
+    :param password:
+        The password, as ``str`` or ``bytes``.
+    :param salt:
+        Bytes mixed into the derivation.  Typically the user's id.
+    :param kdf:
+        A callable taking ``(password, salt, length)`` and returning
+        ``length`` pseudo-random bytes.  Defaults to :class:`ScryptKDF`.
+
+    :returns:
+        An integer in the range ``[1, q)``.
+    """
+    if kdf is None:
+        kdf = ScryptKDF()
+
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    if isinstance(salt, str):
+        salt = salt.encode('utf-8')
+
+    return 1 + _uniform_below(
+        lambda length: kdf(password, salt, length), parameters.q - 1,
+    )
+
+
+class SecretProvider(object):
+    """
+    Interface for looking up the password for a user.
+
+    Implementations should override :meth:`lookup`.
+    """
+    async def lookup(self, user_id):
+        """
+        Returns the password for ``user_id`` as ``str`` or ``bytes``, or
+        ``None`` if the user is not known.
+        """
+        raise NotImplementedError()
+
+
+class SecretResolver(object):
+    """
+    Turns user ids into secrets using a :class:`SecretProvider`, a key
+    derivation function, and a cache.
+
+    :param provider:
+        The :class:`SecretProvider` used to look up passwords.
+    :param parameters:
+        The parameter set that secrets will be used with.
+    :param kdf:
+        Key derivation function.  See :func:`derive_secret`.
+    :param cache:
+        A :class:`~jpake.cache.SecretCache`.  Pass ``False`` to disable
+        caching.
+    :param executor:
+        The executor to run the key derivation function in.  Defaults to the
+        event loop's default executor.
+    """
+    __slots__ = ['provider', 'parameters', '_kdf', '_cache', '_executor']
+
+    def __init__(
+        self, provider, *, parameters=NIST_128, kdf=None, cache=None,
+        executor=None
+    ):
+        if kdf is None:
+            kdf = ScryptKDF()
+        if cache is None:
+            cache = SecretCache()
+        elif cache is False:
+            cache = None
+
+        self.provider = provider
+        self.parameters = parameters
+        self._kdf = kdf
+        self._cache = cache
+        self._executor = executor
+
+    @property
+    def cache(self):
+        """The :class:`~jpake.cache.SecretCache`, or ``None``."""
+        return self._cache
+
+    async def resolve(self, user_id):
+        """
+        Returns the secret for ``user_id``.
+
+        :raises KeyError:
+            If the provider does not know the user.
+        """
+        if isinstance(user_id, str):
+            user_id = user_id.encode('utf-8')
+
+        if self._cache is not None:
+            secret = self._cache.get(user_id)
+            if secret is not None:
+                return secret
+
+        password = await self.provider.lookup(user_id)
+        if password is None:
+            raise KeyError(user_id)
+
+        loop = asyncio.get_running_loop()
+        secret = await loop.run_in_executor(
+            self._executor, _derive, password, user_id, self.parameters,
+            self._kdf,
+        )
+
+        if self._cache is not None:
+            self._cache.put(user_id, secret)
+        return secret
+
+
+def _derive(password, salt, parameters, kdf):
+    return derive_secret(password, salt=salt, parameters=parameters, kdf=kdf)
+
+
+class SessionManager(object):
+    """
+    Runs the server side of handshakes, looking up the client's secret while
+    step one is processed.
+
+    :param resolver:
+        The :class:`SecretResolver` used to find secrets.
+    :param signer_id:
+        The server's signer id.
+    :param executor:
+        The executor in which to run each step.  Defaults to the event loop's
+        default executor.
+    :param admission:
+        An optional :class:`~jpake.admission.AdmissionController` limiting
+        how many handshakes are processed at once.  :meth:`start` and
+        :meth:`finish` each take a turn, and the time taken by every step is
+        recorded in its cost estimates.
+    :param jpake_kwargs:
+        Extra keyword arguments passed to :class:`~jpake.JPAKE`.
+    """
+    __slots__ = [
+        'resolver', 'signer_id', 'admission', '_executor', '_jpake_kwargs',
+    ]
+
+    def __init__(
+        self, resolver, *, signer_id, executor=None, admission=None,
+        **jpake_kwargs
+    ):
+        self.resolver = resolver
+        self.signer_id = signer_id
+        self.admission = admission
+        self._executor = executor
+        self._jpake_kwargs = jpake_kwargs
+
+    async def start(self, user_id, remote_one):
+        """
+        Creates a new :class:`~jpake.JPAKE` session for ``user_id``, processes
+        the client's step one message and sets the secret.
+
+        The secret is resolved concurrently with the processing of
+        ``remote_one`` and the computation of the server's own step one.
+
+        :returns:
+            A ``(session, one)`` tuple, where ``one`` is the server's step
+            one message, to be sent back to the client.
+        :raises KeyError:
+            If the user is not known.
+        :raises InvalidProofError:
+            If the client's proofs fail.
+        :raises OverloadedError:
+            If turned away by the admission controller.  No work will have
+            been done.
+        """
+        admission = self.admission
+        if admission is not None:
+            # Only the exponentiation heavy work done in the executor holds
+            # a turn.  Waiting for the secret does not.
+            await admission.acquire(steps=START_STEPS)
+            costs = admission.costs
+        else:
+            costs = None
+
+        try:
+            session = JPAKE(
+                signer_id=self.signer_id,
+                parameters=self.resolver.parameters,
+                **self._jpake_kwargs
+            )
+
+            loop = asyncio.get_running_loop()
+            secret = asyncio.ensure_future(self.resolver.resolve(user_id))
+            try:
+                one = await loop.run_in_executor(
+                    self._executor, _step_one, session, remote_one, costs,
+                )
+            except BaseException:
+                if not secret.cancel() and not secret.cancelled():
+                    # Already finished.  Retrieve any exception so that it
+                    # isn't reported as unhandled.
+                    secret.exception()
+                raise
+        finally:
+            if admission is not None:
+                admission.release()
+
+        session.set_secret(await secret)
+        return session, one
+
+    async def finish(self, session, remote_two):
+        """
+        Processes the client's step two message for a session created by
+        :meth:`start`, computes the server's own step two message and then
+        the agreed key.
+
+        :returns:
+            The server's step two message, to be sent back to the client.
+        :raises InvalidProofError:
+            If the client's proof fails.
+        :raises OverloadedError:
+            If turned away by the admission controller.  No work will have
+            been done and ``finish`` can be retried.
+        """
+        admission = self.admission
+        if admission is not None:
+            await admission.acquire(steps=FINISH_STEPS)
+            costs = admission.costs
+        else:
+            costs = None
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, _step_two, session, remote_two, costs,
+            )
+        finally:
+            if admission is not None:
+                admission.release()
+
+
+def _step_one(session, remote_one, costs):
+    if costs is None:
+        session.process_one(remote_one)
+        return session.one()
+
+    with costs.measure('verify_one'):
+        session.process_one(remote_one)
+    with costs.measure('compute_one'):
+        return session.one()
+
+
+def _step_two(session, remote_two, costs):
+    if costs is None:
+        session.process_two(remote_two)
+        two = session.two()
+        session._finish_three()
+        return two
+
+    with costs.measure('verify_two'):
+        session.process_two(remote_two)
+    with costs.measure('compute_two'):
+        two = session.two()
+    with costs.measure('compute_three'):
+        session._finish_three()
+    return two
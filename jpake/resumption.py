@@ -0,0 +1,407 @@
+"""
+Resumption of sessions without repeating the key agreement.
+
+Once a :class:`~jpake.JPAKE` handshake has completed, both ends can derive a
+resumption secret from ``K`` with :func:`resumption_secret`.  The server
+seals that secret inside an encrypted, time limited ticket, which it hands to
+the client to keep alongside its own copy of the secret.  When the client
+reconnects it presents the ticket together with a fresh nonce.  The server
+opens the ticket, and both ends derive a new key from the resumption secret
+and the two nonces::
+
+    # Server, at the end of a full handshake.
+    ticket = issuer.issue(resumption_secret(session))
+
+    # Client, on reconnect.
+    client = ResumeClient(ticket=ticket, secret=resumption_secret(session))
+    hello = client.hello()
+
+    # Server.
+    resumed, reply = issuer.resume(hello)
+
+    # Client.
+    client.process_reply(reply)
+    confirm = client.confirm()
+
+    # Server.
+    resumed.process_confirm(confirm)
+
+Each side proves that it holds the key before the other will use it: the
+server by opening the ticket, and the client by knowing the resumption
+secret.  The server's :attr:`ResumedSession.K` is not available until the
+client's confirmation has been checked, since anyone who has seen a ticket can
+present it.
+
+By default each ticket can only be used once.  The issuer remembers the
+tickets it has accepted in a :class:`~jpake.cache.ReplayCache`, so the
+guarantee only holds for as many tickets as the cache can hold, and only on
+the issuer that accepted the ticket.  Servers sharing a ticket key should
+share a cache too.
+
+The resumed handshake costs a handful of HMAC invocations rather than a dozen
+modular exponentiations.  Tickets are protected with encrypt-then-MAC using
+HMAC-SHA256, both as a stream cipher in counter mode and as the MAC, so only
+the standard library is needed.
+
+Servers should call :meth:`TicketIssuer.rotate` periodically.  Tickets issued
+under a retired key remain valid until they expire.
+"""
+import hmac
+import os
+import threading
+import time
+
+from hashlib import sha256
+
+from jpake.cache import ReplayCache
+from jpake.exceptions import InvalidTicketError, OutOfSequenceError
+
+
+#: Length, in bytes, of resumption secrets, nonces and derived keys.
+SECRET_LENGTH = 32
+
+_NAME_LENGTH = 8
+_IV_LENGTH = 16
+_TAG_LENGTH = 32
+
+
+def _hmac(key, *parts):
+    return hmac.new(key, b"".join(parts), sha256).digest()
+
+
+def _key_bytes(K):
+    if isinstance(K, int):
+        return K.to_bytes((K.bit_length() // 8) + 1, byteorder='big')
+    return K
+
+
+def resumption_secret(session):
+    """
+    Derives the secret to seal in a resumption ticket from the key agreed by
+    ``session``, which may be a :class:`~jpake.JPAKE` instance or a
+    :class:`ResumedSession`.  Both ends of the session will derive the same
+    value.
+    """
+    return _hmac(_key_bytes(session.K), b"jpake resumption secret")
+
+
+def _keystream_xor(key, iv, data):
+    blocks = []
+    for counter in range(-(-len(data) // 32)):
+        blocks.append(_hmac(key, iv, counter.to_bytes(4, 'big')))
+    stream = b"".join(blocks)[:len(data)]
+    return (
+        int.from_bytes(data, 'big') ^ int.from_bytes(stream, 'big')
+    ).to_bytes(len(data), 'big')
+
+
+class _TicketKey(object):
+    __slots__ = ['name', 'encryption_key', 'mac_key', 'retired']
+
+    def __init__(self, master):
+        if len(master) < 16:
+            raise ValueError("ticket keys must be at least 16 bytes")
+        self.name = _hmac(master, b"name")[:_NAME_LENGTH]
+        self.encryption_key = _hmac(master, b"encryption")
+        self.mac_key = _hmac(master, b"mac")
+        self.retired = None
+
+
+class ResumedSession(object):
+    """
+    The server's end of a resumed session.  Created by
+    :meth:`TicketIssuer.resume`.
+
+    The session should not be trusted until the client's confirmation has
+    been passed to :meth:`process_confirm`.
+    """
+    __slots__ = ['peer_id', '_K', 'waiting_confirm']
+
+    def __init__(self, *, peer_id, K):
+        self.peer_id = peer_id
+        self._K = K
+        self.waiting_confirm = True
+
+    @property
+    def K(self):
+        """
+        The new session key.
+
+        .. warning::
+            This value is private.  Great care should be taken to make sure
+            that it is not leaked.
+
+        :type: bytes
+        """
+        if self.waiting_confirm:
+            raise AttributeError("K is not available yet")
+        return self._K
+
+    def process_confirm(self, message):
+        """
+        Reads in the message returned by :meth:`ResumeClient.confirm`.
+
+        :raises InvalidTicketError:
+            If the client did not prove that it knows the resumption secret.
+        """
+        if not self.waiting_confirm:
+            raise OutOfSequenceError("confirmation already processed")
+
+        if not hmac.compare_digest(
+            _client_confirmation(self._K), message['confirm'],
+        ):
+            raise InvalidTicketError("client confirmation did not match")
+
+        self.waiting_confirm = False
+
+
+def _session_key(secret, client_nonce, server_nonce):
+    return _hmac(secret, b"jpake resumed key", client_nonce, server_nonce)
+
+
+def _server_confirmation(key):
+    return _hmac(key, b"jpake resumed server")
+
+
+def _client_confirmation(key):
+    return _hmac(key, b"jpake resumed client")
+
+
+class TicketIssuer(object):
+    """
+    Issues and opens resumption tickets.  A single issuer can safely be
+    shared between threads.
+
+    :param lifetime:
+        Number of seconds for which each ticket is valid.
+    :param key:
+        Initial ticket key, as at least 16 random bytes.  Servers sharing a
+        key can open each other's tickets.  Defaults to a random key.
+    :param replay_cache:
+        A :class:`~jpake.cache.ReplayCache` remembering the tickets that have
+        been used, so that each can only be used once.  Its ``ttl`` should
+        be at least ``lifetime``.  Defaults to a new cache with a ``ttl`` of
+        ``lifetime``.  Pass ``False`` to allow tickets to be reused until
+        they expire.
+    :param clock:
+        A function returning the current time in seconds since the epoch.
+        Defaults to :func:`time.time`.
+    """
+    __slots__ = ['lifetime', 'replay_cache', '_clock', '_lock', '_keys']
+
+    def __init__(
+        self, *, lifetime=86400, key=None, replay_cache=None, clock=None
+    ):
+        if clock is None:
+            clock = time.time
+        if replay_cache is None:
+            replay_cache = ReplayCache(ttl=lifetime)
+        elif replay_cache is False:
+            replay_cache = None
+
+        self.lifetime = lifetime
+        self.replay_cache = replay_cache
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # Most recent first.  Only the first is used to issue new tickets.
+        self._keys = []
+        self.rotate(key)
+
+    def rotate(self, key=None):
+        """
+        Starts issuing tickets under a new key.  The previous key is kept, so
+        that the tickets it issued can still be opened, until they have all
+        expired.
+
+        :param key:
+            The new key, as at least 16 random bytes.  Defaults to a random
+            key.
+        """
+        if key is None:
+            key = os.urandom(SECRET_LENGTH)
+        ticket_key = _TicketKey(key)
+
+        with self._lock:
+            now = self._clock()
+            if self._keys:
+                self._keys[0].retired = now
+            self._keys = [ticket_key] + [
+                old for old in self._keys
+                if old.retired + self.lifetime > now
+            ]
+
+    def issue(self, secret, *, peer_id=b""):
+        """
+        Returns a ticket sealing ``secret``, which should be the result of
+        calling :func:`resumption_secret` on the session being resumed.
+
+        :param peer_id:
+            Identifies the client.  Available to the server as
+            :attr:`ResumedSession.peer_id` when the ticket is used.
+        """
+        if len(secret) != SECRET_LENGTH:
+            raise ValueError("secret must be %d bytes" % SECRET_LENGTH)
+        if len(peer_id) >= 2**16:
+            raise ValueError("peer_id too long")
+
+        with self._lock:
+            ticket_key = self._keys[0]
+            expires = int(self._clock() + self.lifetime)
+
+        plaintext = b"".join((
+            expires.to_bytes(8, 'big'),
+            len(peer_id).to_bytes(2, 'big'), peer_id,
+            secret,
+        ))
+
+        iv = os.urandom(_IV_LENGTH)
+        body = ticket_key.name + iv + _keystream_xor(
+            ticket_key.encryption_key, iv, plaintext,
+        )
+        return body + _hmac(ticket_key.mac_key, body)
+
+    def open(self, ticket):
+        """
+        Returns a ``(secret, peer_id)`` tuple with the values sealed in
+        ``ticket``.
+
+        :raises InvalidTicketError:
+            If the ticket is not valid.
+        """
+        minimum = _NAME_LENGTH + _IV_LENGTH + 10 + SECRET_LENGTH + _TAG_LENGTH
+        if len(ticket) < minimum:
+            raise InvalidTicketError("ticket truncated")
+
+        name = ticket[:_NAME_LENGTH]
+        with self._lock:
+            now = self._clock()
+            for ticket_key in self._keys:
+                if hmac.compare_digest(ticket_key.name, name):
+                    break
+            else:
+                raise InvalidTicketError("unknown ticket key")
+
+        body, tag = ticket[:-_TAG_LENGTH], ticket[-_TAG_LENGTH:]
+        if not hmac.compare_digest(_hmac(ticket_key.mac_key, body), tag):
+            raise InvalidTicketError("ticket has been tampered with")
+
+        iv = body[_NAME_LENGTH:_NAME_LENGTH + _IV_LENGTH]
+        plaintext = _keystream_xor(
+            ticket_key.encryption_key, iv,
+            body[_NAME_LENGTH + _IV_LENGTH:],
+        )
+
+        expires = int.from_bytes(plaintext[:8], 'big')
+        if expires <= now:
+            raise InvalidTicketError("ticket has expired")
+
+        peer_id_length = int.from_bytes(plaintext[8:10], 'big')
+        peer_id = plaintext[10:10 + peer_id_length]
+        secret = plaintext[10 + peer_id_length:]
+        if len(secret) != SECRET_LENGTH:
+            raise InvalidTicketError("malformed ticket")
+
+        if self.replay_cache is not None:
+            if self.replay_cache.seen(sha256(tag).digest()):
+                raise InvalidTicketError("ticket has already been used")
+
+        return secret, peer_id
+
+    def resume(self, hello):
+        """
+        Accepts a client's request to resume a session.
+
+        :param hello:
+            The dictionary returned by :meth:`ResumeClient.hello`.
+
+        :returns:
+            A ``(session, reply)`` tuple, where ``session`` is a
+            :class:`ResumedSession` and ``reply`` is to be sent back to the
+            client.  The session's key is only available once the client's
+            confirmation has been processed.
+
+        :raises InvalidTicketError:
+            If the ticket is not valid.  The client should fall back to a
+            full handshake.
+        """
+        client_nonce = hello['nonce']
+        if len(client_nonce) != SECRET_LENGTH:
+            raise ValueError("nonce must be %d bytes" % SECRET_LENGTH)
+
+        secret, peer_id = self.open(hello['ticket'])
+
+        server_nonce = os.urandom(SECRET_LENGTH)
+        K = _session_key(secret, client_nonce, server_nonce)
+        reply = {
+            'nonce': server_nonce,
+            'confirm': _server_confirmation(K),
+        }
+        return ResumedSession(peer_id=peer_id, K=K), reply
+
+
+class ResumeClient(object):
+    """
+    The client's end of a resumed session.
+
+    :param ticket:
+        A ticket returned by :meth:`TicketIssuer.issue`.
+    :param secret:
+        The client's own copy of the secret sealed in the ticket, from
+        :func:`resumption_secret`.
+    """
+    __slots__ = ['ticket', '_secret', '_nonce', '_K', 'waiting_reply']
+
+    def __init__(self, *, ticket, secret):
+        if len(secret) != SECRET_LENGTH:
+            raise ValueError("secret must be %d bytes" % SECRET_LENGTH)
+
+        self.ticket = ticket
+        self._secret = secret
+        self._nonce = os.urandom(SECRET_LENGTH)
+        self.waiting_reply = True
+
+    @property
+    def K(self):
+        """
+        The new session key.
+
+        .. warning::
+            This value is private.  Great care should be taken to make sure
+            that it is not leaked.
+
+        :type: bytes
+        """
+        if self.waiting_reply:
+            raise AttributeError("K is not available yet")
+        return self._K
+
+    def hello(self):
+        """Returns the message to send to the server."""
+        return {'ticket': self.ticket, 'nonce': self._nonce}
+
+    def process_reply(self, reply):
+        """
+        Reads in the server's reply to :meth:`hello`.
+
+        :raises InvalidTicketError:
+            If the server did not prove that it could open the ticket.
+        """
+        if not self.waiting_reply:
+            raise OutOfSequenceError("reply already processed")
+
+        K = _session_key(self._secret, self._nonce, reply['nonce'])
+        if not hmac.compare_digest(_server_confirmation(K), reply['confirm']):
+            raise InvalidTicketError("server confirmation did not match")
+
+        self._K = K
+        self.waiting_reply = False
+
+    def confirm(self):
+        """
+        Returns the message proving to the server that the client knows the
+        resumption secret.  Only available after :meth:`process_reply`.
+        """
+        if self.waiting_reply:
+            raise OutOfSequenceError("reply not processed yet")
+        return {'confirm': _client_confirmation(self._K)}
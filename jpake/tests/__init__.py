@@ -1,10 +1,30 @@
 import unittest
 
+from jpake.tests import test_admission
+from jpake.tests import test_batch
+from jpake.tests import test_cache
+from jpake.tests import test_counting
+from jpake.tests import test_exponentiation
+from jpake.tests import test_group
 from jpake.tests import test_jpake
 from jpake.tests import test_parameters
+from jpake.tests import test_providers
+from jpake.tests import test_resumption
+from jpake.tests import test_transcript
+from jpake.tests import test_tuning
 
 loader = unittest.TestLoader()
 suite = unittest.TestSuite((
+    loader.loadTestsFromModule(test_admission),
+    loader.loadTestsFromModule(test_batch),
+    loader.loadTestsFromModule(test_cache),
+    loader.loadTestsFromModule(test_counting),
+    loader.loadTestsFromModule(test_exponentiation),
+    loader.loadTestsFromModule(test_group),
     loader.loadTestsFromModule(test_jpake),
     loader.loadTestsFromModule(test_parameters),
+    loader.loadTestsFromModule(test_providers),
+    loader.loadTestsFromModule(test_resumption),
+    loader.loadTestsFromModule(test_transcript),
+    loader.loadTestsFromModule(test_tuning),
 ))
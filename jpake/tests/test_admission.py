@@ -0,0 +1,291 @@
+import asyncio
+import unittest
+
+from jpake import JPAKE, NIST_80
+from jpake.admission import AdmissionController, CostEstimator
+from jpake.exceptions import OverloadedError
+from jpake.providers import (
+    FINISH_STEPS, START_STEPS, ScryptKDF, SecretProvider, SecretResolver,
+    SessionManager, derive_secret,
+)
+
+
+FAST_KDF = ScryptKDF(n=2**4, r=1, p=1)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DictProvider(SecretProvider):
+    def __init__(self, passwords):
+        self.passwords = passwords
+        self.lookups = 0
+
+    async def lookup(self, user_id):
+        self.lookups += 1
+        return self.passwords.get(user_id)
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class CostEstimatorTestCase(unittest.TestCase):
+    def test_moving_average(self):
+        costs = CostEstimator(alpha=0.5)
+        self.assertEqual(costs.estimate('verify'), 0.0)
+
+        costs.record('verify', 1.0)
+        self.assertEqual(costs.estimate('verify'), 1.0)
+        costs.record('verify', 2.0)
+        self.assertEqual(costs.estimate('verify'), 1.5)
+        costs.record('verify', 0.5)
+        self.assertEqual(costs.estimate('verify'), 1.0)
+
+        self.assertEqual(costs.as_dict(), {'verify': (1.0, 3)})
+
+    def test_measure(self):
+        clock = FakeClock()
+        costs = CostEstimator(clock=clock)
+
+        with costs.measure('compute'):
+            clock.now += 0.25
+        self.assertEqual(costs.estimate('compute'), 0.25)
+
+    def test_measure_failure_not_recorded(self):
+        costs = CostEstimator()
+        with self.assertRaises(RuntimeError):
+            with costs.measure('compute'):
+                raise RuntimeError()
+        self.assertEqual(costs.as_dict(), {})
+
+    def test_invalid_alpha(self):
+        self.assertRaises(ValueError, CostEstimator, alpha=0)
+        self.assertRaises(ValueError, CostEstimator, alpha=1.5)
+
+
+class AdmissionControllerTestCase(unittest.TestCase):
+    def test_admit_immediately(self):
+        admission = AdmissionController(max_in_flight=2)
+
+        async def run():
+            await admission.acquire()
+            await admission.acquire()
+            self.assertEqual(admission.in_flight, 2)
+            admission.release()
+            admission.release()
+
+        _run(run())
+        self.assertEqual(admission.in_flight, 0)
+        self.assertEqual(admission.admitted, 2)
+        self.assertEqual(admission.deferred, 0)
+
+    def test_deferred_in_order(self):
+        admission = AdmissionController(max_in_flight=1, max_queue=2)
+        order = []
+
+        async def handshake(name):
+            async with admission:
+                order.append(name)
+                await asyncio.sleep(0)
+
+        async def run():
+            await admission.acquire()
+            tasks = [
+                asyncio.ensure_future(handshake(name))
+                for name in ("a", "b")
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(admission.queue_depth, 2)
+            admission.release()
+            await asyncio.gather(*tasks)
+
+        _run(run())
+        self.assertEqual(order, ["a", "b"])
+        self.assertEqual(admission.stats()['deferred'], 2)
+        self.assertEqual(admission.in_flight, 0)
+        self.assertEqual(admission.queue_depth, 0)
+
+    def test_shed_when_queue_full(self):
+        admission = AdmissionController(max_in_flight=1, max_queue=0)
+        admission.costs.record('verify_one', 0.2)
+        admission.costs.record('compute_one', 0.1)
+
+        async def run():
+            await admission.acquire()
+            with self.assertRaises(OverloadedError) as context:
+                await admission.acquire()
+            admission.release()
+            return context.exception
+
+        error = _run(run())
+        self.assertAlmostEqual(error.retry_after, 0.3)
+        self.assertEqual(admission.shed, 1)
+        self.assertEqual(admission.in_flight, 0)
+
+    def test_shed_when_wait_too_long(self):
+        admission = AdmissionController(
+            max_in_flight=2, max_queue=100, max_wait=1.0,
+        )
+        admission.costs.record('verify_one', 0.5)
+
+        async def run():
+            await admission.acquire()
+            await admission.acquire()
+
+            # Each waiter adds a quarter of a second.
+            waiters = [
+                asyncio.ensure_future(admission.acquire()) for _ in range(4)
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(admission.queue_depth, 4)
+            self.assertAlmostEqual(admission.estimated_wait(), 1.25)
+
+            with self.assertRaises(OverloadedError) as context:
+                await admission.acquire()
+
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            return context.exception
+
+        error = _run(run())
+        self.assertAlmostEqual(error.retry_after, 1.25)
+        self.assertEqual(admission.shed, 1)
+        self.assertEqual(admission.queue_depth, 0)
+        self.assertEqual(admission.in_flight, 2)
+
+    def test_wait_for_mixed_steps(self):
+        admission = AdmissionController(max_in_flight=1, max_wait=10.0)
+        admission.costs.record('verify_one', 0.5)
+        admission.costs.record('verify_two', 2.0)
+
+        async def run():
+            await admission.acquire()
+            waiters = [
+                asyncio.ensure_future(admission.acquire()),
+                asyncio.ensure_future(admission.acquire(('verify_two',))),
+            ]
+            await asyncio.sleep(0)
+            self.assertAlmostEqual(admission.estimated_wait(), 3.0)
+            self.assertAlmostEqual(
+                admission.estimated_wait(('verify_two',)), 4.5,
+            )
+
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            self.assertEqual(admission.queue_depth, 0)
+            admission.release()
+
+        _run(run())
+        self.assertEqual(admission.in_flight, 0)
+
+    def test_cancelled_waiter_removed(self):
+        admission = AdmissionController(max_in_flight=1)
+
+        async def run():
+            await admission.acquire()
+            waiter = asyncio.ensure_future(admission.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual(admission.queue_depth, 0)
+
+            # Released after the waiter is cancelled but before it has run.
+            waiter = asyncio.ensure_future(admission.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            admission.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual(admission.queue_depth, 0)
+
+        _run(run())
+        self.assertEqual(admission.in_flight, 0)
+
+
+class SessionManagerAdmissionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.provider = DictProvider({b"alice": "hunter42"})
+        self.resolver = SecretResolver(
+            self.provider, parameters=NIST_80, kdf=FAST_KDF,
+        )
+
+    def _client(self):
+        secret = derive_secret(
+            "hunter42", salt=b"alice", parameters=NIST_80, kdf=FAST_KDF,
+        )
+        return JPAKE(secret=secret, signer_id=b"alice", parameters=NIST_80)
+
+    def test_costs_measured(self):
+        admission = AdmissionController(max_in_flight=1)
+        manager = SessionManager(
+            self.resolver, signer_id=b"server", admission=admission,
+        )
+
+        client = self._client()
+        server, server_one = _run(manager.start(b"alice", client.one()))
+        client.process_one(server_one)
+        client.process_two(_run(manager.finish(server, client.two())))
+        self.assertEqual(client.K, server.K)
+
+        costs = admission.costs.as_dict()
+        for step in START_STEPS + FINISH_STEPS:
+            self.assertEqual(costs[step][1], 1)
+        self.assertGreater(admission.cost(), 0)
+        self.assertGreater(admission.cost(FINISH_STEPS), 0)
+        self.assertEqual(admission.admitted, 2)
+        self.assertEqual(admission.in_flight, 0)
+
+    def test_finish_shed(self):
+        admission = AdmissionController(max_in_flight=1, max_queue=0)
+        manager = SessionManager(
+            self.resolver, signer_id=b"server", admission=admission,
+        )
+        client = self._client()
+        server, server_one = _run(manager.start(b"alice", client.one()))
+        client.process_one(server_one)
+        two = client.two()
+
+        async def run():
+            await admission.acquire()
+            try:
+                await manager.finish(server, two)
+            finally:
+                admission.release()
+
+        with self.assertRaises(OverloadedError):
+            _run(run())
+        self.assertTrue(server.waiting_two)
+
+        # Nothing was done, so the step can be retried.
+        client.process_two(_run(manager.finish(server, two)))
+        self.assertEqual(client.K, server.K)
+
+    def test_shed_before_lookup(self):
+        admission = AdmissionController(max_in_flight=1, max_queue=0)
+        manager = SessionManager(
+            self.resolver, signer_id=b"server", admission=admission,
+        )
+
+        async def run():
+            await admission.acquire()
+            try:
+                await manager.start(b"alice", self._client().one())
+            finally:
+                admission.release()
+
+        with self.assertRaises(OverloadedError):
+            _run(run())
+        self.assertEqual(self.provider.lookups, 0)
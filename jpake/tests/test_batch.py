@@ -0,0 +1,135 @@
+import unittest
+
+from random import Random
+
+from jpake import JPAKE, NIST_80, NIST_112, _default_zkp_hash_fn
+from jpake.batch import batch_one, verify_zkps
+from jpake.exceptions import InvalidProofError
+
+
+class VerifyZkpsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rng = Random(0)
+        self.statements = []
+        for index in range(5):
+            session = JPAKE(
+                signer_id=b"member-%d" % index, parameters=NIST_80,
+                random=self.rng,
+            )
+            self.statements.append((NIST_80.g, session.gx1, session.zkp_x1))
+            self.statements.append((NIST_80.g, session.gx2, session.zkp_x2))
+
+    def _verify(self, statements, **kwargs):
+        verify_zkps(
+            statements, p=NIST_80.p, zkp_hash=_default_zkp_hash_fn, **kwargs
+        )
+
+    def test_valid(self):
+        self._verify(self.statements)
+
+    def test_empty(self):
+        self._verify([])
+
+    def test_invalid_response(self):
+        generator, gx, zkp = self.statements[3]
+        zkp = dict(zkp, b=(zkp['b'] + 1) % NIST_80.q)
+        self.statements[3] = (generator, gx, zkp)
+        with self.assertRaises(InvalidProofError):
+            self._verify(self.statements)
+
+    def test_swapped_statement(self):
+        generator, gx, zkp = self.statements[0]
+        self.statements[0] = (generator, self.statements[2][1], zkp)
+        with self.assertRaises(InvalidProofError):
+            self._verify(self.statements)
+
+    def test_unreduced_commitment(self):
+        generator, gx, zkp = self.statements[1]
+        zkp = dict(zkp, gr=zkp['gr'] + NIST_80.p)
+        self.statements[1] = (generator, gx, zkp)
+        with self.assertRaises(InvalidProofError):
+            self._verify(self.statements)
+
+    def test_negative_response(self):
+        generator, gx, zkp = self.statements[4]
+        zkp = dict(zkp, b=zkp['b'] - NIST_80.q)
+        self.statements[4] = (generator, gx, zkp)
+        self._verify(self.statements)
+
+    def test_shared_tables(self):
+        tables = {}
+        self._verify(self.statements, tables=tables)
+        self.assertEqual(list(tables), [NIST_80.g])
+
+        self._verify(self.statements[:1], tables=tables)
+
+    def test_negated_commitments(self):
+        p, q, g = NIST_80.p, NIST_80.q, NIST_80.g
+
+        # Proofs with commitments of ``-g^r``, and challenges computed over
+        # the negated values.  The order two components cancel out if the
+        # proofs are combined with odd weights.
+        statements = []
+        for index in range(2):
+            session = JPAKE(
+                signer_id=b"member-%d" % index, parameters=NIST_80,
+                random=self.rng,
+            )
+            r = self.rng.randrange(q)
+            gr = p - pow(g, r, p)
+            h = _default_zkp_hash_fn(
+                g=g, gr=gr, gx=session.gx1, signer_id=session.signer_id,
+            )
+            zkp = {
+                'gr': gr,
+                'b': (r - session.x1 * h) % q,
+                'id': session.signer_id,
+            }
+            statements.append((g, session.gx1, zkp))
+
+        for _ in range(10):
+            with self.assertRaises(InvalidProofError):
+                self._verify(statements)
+
+        verifier = JPAKE(signer_id=b"verifier", parameters=NIST_80)
+        for generator, gx, zkp in statements:
+            with self.assertRaises(InvalidProofError):
+                verifier._verify_zkp(generator, gx, zkp)
+
+
+class BatchOneTestCase(unittest.TestCase):
+    def test_matches_unbatched(self):
+        sessions = [
+            JPAKE(signer_id=b"server", parameters=parameters)
+            for parameters in (NIST_80, NIST_112, NIST_80, NIST_80)
+        ]
+        batch_one(sessions, window=3)
+
+        for session in sessions:
+            p, g = session.p, session.g
+            self.assertEqual(session.gx1, pow(g, session.x1, p))
+            self.assertEqual(session.gx2, pow(g, session.x2, p))
+            for gx, zkp in (
+                (session.gx1, session.zkp_x1), (session.gx2, session.zkp_x2),
+            ):
+                h = _default_zkp_hash_fn(
+                    g=g, gr=zkp['gr'], gx=gx, signer_id=b"server",
+                )
+                self.assertEqual(
+                    zkp['gr'], (pow(g, zkp['b'], p) * pow(gx, h, p)) % p,
+                )
+
+    def test_one_returns_batched(self):
+        alice = JPAKE(
+            secret="hunter42", signer_id=b"alice", parameters=NIST_80,
+        )
+        bob = JPAKE(secret="hunter42", signer_id=b"bob", parameters=NIST_80)
+        batch_one([alice, bob])
+
+        alice_one = alice.one()
+        self.assertEqual(alice_one['gx1'], alice.gx1)
+        self.assertEqual(alice_one['zkp_x1'], dict(alice.zkp_x1))
+
+        alice.process_one(bob.one()), bob.process_one(alice_one)
+        alice.process_two(bob.two()), bob.process_two(alice.two())
+        self.assertEqual(alice.K, bob.K)
@@ -0,0 +1,147 @@
+import unittest
+
+from unittest import mock
+
+import jpake
+
+from jpake import JPAKE, NIST_80
+from jpake.cache import ReplayCache, proof_digest
+from jpake.exceptions import ReplayedProofError
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ReplayCacheTestCase(unittest.TestCase):
+    def test_seen(self):
+        cache = ReplayCache()
+        self.assertFalse(cache.seen(b"a"))
+        self.assertTrue(cache.seen(b"a"))
+        self.assertFalse(cache.seen(b"b"))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = ReplayCache(ttl=10, clock=clock)
+        cache.seen(b"a")
+
+        clock.now = 9
+        self.assertTrue(cache.seen(b"a"))
+
+        clock.now = 11
+        self.assertFalse(cache.seen(b"a"))
+
+    def test_max_entries(self):
+        cache = ReplayCache(max_entries=2)
+        cache.seen(b"a")
+        cache.seen(b"b")
+        cache.seen(b"c")
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(cache.seen(b"a"))
+        self.assertTrue(cache.seen(b"c"))
+
+    def test_invalid_max_entries(self):
+        with self.assertRaises(ValueError):
+            ReplayCache(max_entries=0)
+
+    def test_clear(self):
+        cache = ReplayCache()
+        cache.seen(b"a")
+        cache.seen(b"a")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_digest_normalised(self):
+        p, q = NIST_80.p, NIST_80.q
+        zkp = {'gr': 1234, 'b': 5678, 'id': b"bob"}
+        variant = {'gr': 1234 + p, 'b': 5678 + q, 'id': b"bob"}
+        self.assertEqual(
+            proof_digest(99, zkp, p=p, q=q),
+            proof_digest(99 + p, variant, p=p, q=q),
+        )
+        self.assertNotEqual(
+            proof_digest(99, zkp, p=p, q=q),
+            proof_digest(99, dict(zkp, id=b"eve"), p=p, q=q),
+        )
+
+    def test_digest_several_values(self):
+        p, q = NIST_80.p, NIST_80.q
+        zkp = {'gr': 1234, 'b': 5678, 'id': b"bob"}
+        self.assertEqual(
+            proof_digest((98, 99), zkp, p=p, q=q),
+            proof_digest((98 + p, 99), zkp, p=p, q=q),
+        )
+        self.assertNotEqual(
+            proof_digest((98, 99), zkp, p=p, q=q),
+            proof_digest((99, 98), zkp, p=p, q=q),
+        )
+        self.assertNotEqual(
+            proof_digest((99,), zkp, p=p, q=q),
+            proof_digest((98, 99), zkp, p=p, q=q),
+        )
+
+
+class JPAKEReplayTestCase(unittest.TestCase):
+    def _new(self, signer_id, cache=None):
+        return JPAKE(
+            secret="hunter42", signer_id=signer_id, parameters=NIST_80,
+            replay_cache=cache,
+        )
+
+    def test_replayed_one(self):
+        cache = ReplayCache()
+        bob_one = self._new(b"bob").one()
+
+        self._new(b"alice", cache).process_one(bob_one)
+
+        alice = self._new(b"alice", cache)
+        with mock.patch.object(jpake, 'multi_pow') as multi_pow:
+            with self.assertRaises(ReplayedProofError):
+                alice.process_one(bob_one)
+            multi_pow.assert_not_called()
+        self.assertTrue(alice.waiting_one)
+        self.assertEqual(cache.hits, 2)
+
+    def test_replayed_two(self):
+        cache = ReplayCache()
+        alice = self._new(b"alice", cache)
+        bob = self._new(b"bob")
+
+        alice.process_one(bob.one()), bob.process_one(alice.one())
+        bob_two = bob.two()
+        alice.process_two(bob_two)
+
+        # Replaying step two into a new session.
+        carol = self._new(b"carol", cache)
+        carol.process_one(self._new(b"dave").one())
+        with self.assertRaises(ReplayedProofError):
+            carol.process_two(bob_two)
+
+    def test_fresh_handshakes(self):
+        cache = ReplayCache()
+        for _ in range(3):
+            alice = self._new(b"alice", cache)
+            bob = self._new(b"bob", cache)
+            alice.process_one(bob.one()), bob.process_one(alice.one())
+            alice.process_two(bob.two()), bob.process_two(alice.two())
+            self.assertEqual(alice.K, bob.K)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 18)
+
+    def test_unverified_not_recorded(self):
+        cache = ReplayCache()
+        bob_one = self._new(b"bob").one()
+        alice = self._new(b"alice", cache)
+        alice.process_one(
+            remote_gx1=bob_one['gx1'], remote_gx2=bob_one['gx2'],
+            verify=False,
+        )
+        self.assertEqual(len(cache), 0)
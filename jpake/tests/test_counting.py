@@ -0,0 +1,201 @@
+import unittest
+
+from random import Random
+
+from jpake import JPAKE, NIST_80, NIST_112, NIST_128, Tuning
+from jpake.counting import (
+    CountingInt, OperationCounter, counting_hash, counting_parameters,
+)
+
+
+class CountingIntTestCase(unittest.TestCase):
+    def test_counts(self):
+        counter = OperationCounter()
+        a = CountingInt(7)
+
+        with counter.count('step'):
+            b = (a * 5) % 11
+            c = (3 * b) % 11
+            d = c * c
+            e = pow(a, 10, 13)
+
+        self.assertEqual((b, c, d, e), (2, 6, 36, pow(7, 10, 13)))
+        for value in (b, c, d, e):
+            self.assertIsInstance(value, CountingInt)
+
+        counts = counter['step']
+        self.assertEqual(counts.mul, 2)
+        self.assertEqual(counts.sqr, 1)
+        self.assertEqual(counts.mod, 2)
+        self.assertEqual(counts.pow, 1)
+        self.assertEqual(counts.pow_bits, 4)
+
+    def test_only_counted_in_block(self):
+        counter = OperationCounter()
+        a = CountingInt(7)
+        a * a
+        with counter.count('step'):
+            a * a
+        a * a
+        self.assertEqual(counter['step'].sqr, 1)
+
+    def test_nested(self):
+        counter = OperationCounter()
+        a = CountingInt(7)
+        with counter.count('outer'):
+            a * 2
+            with counter.count('inner'):
+                a * 3
+            a * 4
+        self.assertEqual(counter['outer'].mul, 2)
+        self.assertEqual(counter['inner'].mul, 1)
+
+    def test_hash(self):
+        counter = OperationCounter()
+        calls = []
+
+        def hash_fn(**kwargs):
+            calls.append(kwargs)
+            return 1
+
+        counted = counting_hash(hash_fn)
+        with counter.count('step'):
+            counted(g=1, gr=2, gx=3, signer_id=b"alice")
+        self.assertEqual(counter['step'].hash, 1)
+        self.assertEqual(len(calls), 1)
+
+
+class OperationBudgetTestCase(unittest.TestCase):
+    """
+    Checks that each step of a handshake stays within an operation budget
+    derived from the cost of the exponentiation routines it should be using.
+    """
+    tuning = Tuning()
+
+    #: Bit length of the challenges produced by the default proof hash.
+    hash_bits = 160
+
+    def _table_pow_muls(self, bits, window):
+        # One multiplication per window plus accumulation of the buckets.
+        return -(-bits // window) + 2 * 2**window
+
+    def _multi_pow_muls(self, bits, window):
+        # Odd powers, then at most one multiplication per window.
+        return 2**(window - 1) + 1 + -(-bits // window) + 1
+
+    def _handshake(self, parameters, *, compact=False):
+        parameters = counting_parameters(parameters)
+
+        # The generator table is shared by every session, so build it
+        # outside of the counted steps.
+        parameters.generator_table(self.tuning.fixed_base_window)
+
+        def session(signer_id, seed):
+            return JPAKE(
+                secret="hunter42", signer_id=signer_id,
+                parameters=parameters, zkp_hash_function=counting_hash(),
+                random=Random(seed), tuning=self.tuning, compact=compact,
+            )
+
+        counter = OperationCounter()
+        alice = session(b"alice", 1)
+        bob = session(b"bob", 2)
+
+        with counter.count('one'):
+            alice_one = alice.one()
+        bob_one = bob.one()
+        with counter.count('process_one'):
+            alice.process_one(bob_one)
+        bob.process_one(alice_one)
+
+        with counter.count('two'):
+            alice_two = alice.two()
+        bob_two = bob.two()
+        with counter.count('process_two'):
+            alice.process_two(bob_two)
+        bob.process_two(alice_two)
+
+        with counter.count('three'):
+            K = alice.K
+        self.assertEqual(K, bob.K)
+
+        return counter
+
+    def _check_budgets(self, parameters):
+        bits = parameters.q.bit_length()
+        fixed_window = self.tuning.fixed_base_window
+        session_window = self.tuning.session_window
+        multi_window = self.tuning.multi_window
+        rows = -(-bits // session_window)
+
+        counter = self._handshake(parameters)
+
+        # Two values and two commitments from the generator table.
+        one = counter['one']
+        self.assertEqual(one.pow, 0)
+        self.assertEqual(one.sqr, 0)
+        self.assertEqual(one.hash, 2)
+        self.assertLessEqual(
+            one.mul, 4 * self._table_pow_muls(bits, fixed_window),
+        )
+
+        # Two proofs, each with one table exponentiation and one chain of
+        # squarings as long as the challenge.
+        process_one = counter['process_one']
+        self.assertEqual(process_one.pow, 0)
+        self.assertEqual(process_one.hash, 2)
+        self.assertLessEqual(process_one.sqr, 2 * self.hash_bits)
+        self.assertLessEqual(process_one.mul, 2 * (
+            self._table_pow_muls(bits, fixed_window)
+            + self._multi_pow_muls(self.hash_bits, multi_window)
+        ) + 2)
+
+        # Building the table for the base of ``A`` costs one short ``pow``
+        # per row.  ``A`` and its commitment then come from the table.
+        two = counter['two']
+        self.assertEqual(two.pow, rows)
+        self.assertEqual(two.pow_bits, rows * (session_window + 1))
+        self.assertEqual(two.sqr, 0)
+        self.assertEqual(two.hash, 1)
+        self.assertLessEqual(
+            two.mul, 2 * self._table_pow_muls(bits, session_window) + 4,
+        )
+
+        # One proof, with the response reduced mod ``q``, checked with a
+        # single chain of squarings.
+        process_two = counter['process_two']
+        self.assertEqual(process_two.pow, 0)
+        self.assertEqual(process_two.hash, 1)
+        self.assertLessEqual(process_two.sqr, bits)
+        self.assertLessEqual(process_two.mul, (
+            self._multi_pow_muls(bits, multi_window)
+            + self._multi_pow_muls(self.hash_bits, multi_window) + 2
+        ))
+
+        # Both exponents reduced mod ``q`` and computed together.
+        three = counter['three']
+        self.assertEqual(three.pow, 0)
+        self.assertEqual(three.hash, 0)
+        self.assertLessEqual(three.sqr, bits)
+        self.assertLessEqual(
+            three.mul, 2 * self._multi_pow_muls(bits, multi_window) + 2,
+        )
+
+    def test_nist_80(self):
+        self._check_budgets(NIST_80)
+
+    def test_nist_112(self):
+        self._check_budgets(NIST_112)
+
+    def test_nist_128(self):
+        self._check_budgets(NIST_128)
+
+    def test_compact_process_one(self):
+        standard = self._handshake(NIST_80)['process_one']
+        compact = self._handshake(NIST_80, compact=True)['process_one']
+
+        # Both challenges share a single chain of squarings.
+        self.assertEqual(compact.pow, 0)
+        self.assertLessEqual(compact.sqr, self.hash_bits)
+        self.assertLess(compact.sqr, standard.sqr)
+        self.assertLess(compact.mul, standard.mul)
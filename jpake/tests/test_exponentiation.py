@@ -0,0 +1,118 @@
+import unittest
+
+from random import Random
+
+from jpake.parameters import NIST_80
+from jpake.exponentiation import FixedBaseTable, FullFixedBaseTable, multi_pow
+
+
+class FixedBaseTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rng = Random(0)
+        self.p = NIST_80.p
+        self.q = NIST_80.q
+        self.base = pow(NIST_80.g, self.rng.randrange(self.q), self.p)
+
+    def test_matches_pow(self):
+        for window in (1, 2, 4, 5, 7):
+            table = FixedBaseTable(
+                self.base, self.p, bits=self.q.bit_length(), window=window,
+            )
+            for _ in range(10):
+                exponent = self.rng.randrange(self.q)
+                self.assertEqual(
+                    table.pow(exponent), pow(self.base, exponent, self.p),
+                )
+
+    def test_edge_exponents(self):
+        table = FixedBaseTable(self.base, self.p, bits=self.q.bit_length())
+        for exponent in (0, 1, 2, 15, 16, 17, self.q - 1):
+            self.assertEqual(
+                table.pow(exponent), pow(self.base, exponent, self.p),
+            )
+
+    def test_oversized_exponent(self):
+        table = FixedBaseTable(self.base, self.p, bits=16)
+        exponent = self.rng.randrange(self.q)
+        self.assertEqual(
+            table.pow(exponent), pow(self.base, exponent, self.p),
+        )
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            FixedBaseTable(self.base, self.p, bits=16, window=0)
+
+
+class MultiPowTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rng = Random(0)
+        self.p = NIST_80.p
+        self.q = NIST_80.q
+
+    def _element(self):
+        return pow(NIST_80.g, self.rng.randrange(self.q), self.p)
+
+    def _expected(self, pairs):
+        result = 1
+        for base, exponent in pairs:
+            result = (result * pow(base, exponent, self.p)) % self.p
+        return result
+
+    def test_matches_pow(self):
+        for window in (1, 3, 4, 6):
+            for count in (1, 2, 3, 8):
+                pairs = [
+                    (self._element(), self.rng.randrange(self.q))
+                    for _ in range(count)
+                ]
+                self.assertEqual(
+                    multi_pow(pairs, self.p, window=window),
+                    self._expected(pairs),
+                )
+
+    def test_mixed_lengths(self):
+        pairs = [
+            (self._element(), self.rng.randrange(self.q)),
+            (self._element(), self.rng.getrandbits(20)),
+            (self._element(), 1),
+        ]
+        self.assertEqual(multi_pow(pairs, self.p), self._expected(pairs))
+
+    def test_zero_exponents(self):
+        pairs = [(self._element(), 0), (self._element(), 0)]
+        self.assertEqual(multi_pow(pairs, self.p), 1)
+        self.assertEqual(multi_pow([], self.p), 1)
+
+    def test_negative_exponent(self):
+        base = self._element()
+        exponent = self.rng.randrange(self.q)
+        self.assertEqual(
+            multi_pow([(base, -exponent)], self.p),
+            pow(pow(base, exponent, self.p), self.p - 2, self.p),
+        )
+
+
+class FullFixedBaseTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rng = Random(0)
+        self.p = NIST_80.p
+        self.q = NIST_80.q
+        self.base = pow(NIST_80.g, self.rng.randrange(self.q), self.p)
+
+    def test_matches_pow(self):
+        for window in (1, 3, 6):
+            table = FullFixedBaseTable(
+                self.base, self.p, bits=self.q.bit_length(), window=window,
+            )
+            exponents = [self.rng.randrange(self.q) for _ in range(10)]
+            exponents += [0, 1, self.q - 1]
+            self.assertEqual(table.pow_many(exponents), [
+                pow(self.base, exponent, self.p) for exponent in exponents
+            ])
+
+    def test_oversized_exponent(self):
+        table = FullFixedBaseTable(self.base, self.p, bits=16, window=3)
+        exponent = self.rng.randrange(self.q)
+        self.assertEqual(
+            table.pow(exponent), pow(self.base, exponent, self.p),
+        )
@@ -0,0 +1,110 @@
+import unittest
+
+from jpake import NIST_80
+from jpake.group import JPAKEGroup
+from jpake.exceptions import (
+    DuplicateSignerError, InvalidProofError, MismatchedKeyError,
+    OutOfSequenceError,
+)
+
+
+def _others(values, index):
+    return values[:index] + values[index + 1:]
+
+
+class JPAKEGroupTestCase(unittest.TestCase):
+    def _members(self, secrets):
+        return [
+            JPAKEGroup(
+                secret=secret, signer_id="member-%d" % index,
+                parameters=NIST_80,
+            )
+            for index, secret in enumerate(secrets)
+        ]
+
+    def _run(self, members):
+        ones = [member.one() for member in members]
+        for index, member in enumerate(members):
+            member.process_one(_others(ones, index))
+
+        twos = [member.two() for member in members]
+        for index, member in enumerate(members):
+            member.process_two(_others(twos, index))
+
+        threes = [member.three() for member in members]
+        for index, member in enumerate(members):
+            member.process_three(_others(threes, index))
+
+    def test_agree(self):
+        for size in (2, 3, 4, 7):
+            members = self._members(["hunter42"] * size)
+            self._run(members)
+            self.assertEqual(len({member.K for member in members}), 1)
+
+    def test_members(self):
+        members = self._members(["hunter42"] * 3)
+        self._run(members)
+        self.assertEqual(members[1].members, (
+            b"member-0", b"member-1", b"member-2",
+        ))
+
+    def test_only_neighbours_in_step_two(self):
+        members = self._members(["hunter42"] * 5)
+        ones = [member.one() for member in members]
+        members[0].process_one(_others(ones, 0))
+        self.assertEqual(
+            set(members[0].two()), {b"member-1", b"member-4"},
+        )
+
+    def test_neighbour_step_two_unrelated(self):
+        # With a shared ``x2`` the victim's two ``A`` values would differ by
+        # ``gx2^(s*d)``, where ``d`` depends only on the neighbours' step one
+        # values, so anyone who sent both could test guesses of ``s``.
+        left, victim, right = self._members(["hunter42"] * 3)
+        ones = [member.one() for member in (left, victim, right)]
+        victim.process_one([ones[0], ones[2]])
+        two = victim.two()
+
+        p, q = victim.p, victim.q
+        s = victim._sides['left'].secret
+        d = (
+            left._sides['left'].x1 + left._sides['right'].x2
+            - right._sides['left'].x1 - right._sides['left'].x2
+        ) % q
+        ratio = (
+            two[b"member-0"]['A'] * pow(two[b"member-2"]['A'], p - 2, p)
+        ) % p
+        for side in ('left', 'right'):
+            self.assertNotEqual(
+                ratio, pow(ones[1]['gx2_' + side], s * d % q, p),
+            )
+        self.assertNotEqual(ones[1]['gx2_left'], ones[1]['gx2_right'])
+
+    def test_wrong_secret(self):
+        members = self._members(["hunter42"] * 3 + ["hunter43"])
+        with self.assertRaises(MismatchedKeyError):
+            self._run(members)
+
+    def test_invalid_proof(self):
+        members = self._members(["hunter42"] * 3)
+        ones = [member.one() for member in members]
+        ones[2]['zkp_x2_right']['b'] += 1
+        with self.assertRaises(InvalidProofError):
+            members[0].process_one(_others(ones, 0))
+
+    def test_duplicate_signer(self):
+        members = self._members(["hunter42"] * 3)
+        mallory = JPAKEGroup(
+            secret="hunter42", signer_id="member-1", parameters=NIST_80,
+        )
+        with self.assertRaises(DuplicateSignerError):
+            members[0].process_one([members[1].one(), mallory.one()])
+
+    def test_out_of_sequence(self):
+        members = self._members(["hunter42"] * 3)
+        self.assertRaises(OutOfSequenceError, members[0].two)
+        self.assertRaises(OutOfSequenceError, members[0].process_two, [])
+        self.assertRaises(OutOfSequenceError, members[0].three)
+        self.assertRaises(OutOfSequenceError, members[0].process_three, [])
+        with self.assertRaises(AttributeError):
+            members[0].K
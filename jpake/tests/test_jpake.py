@@ -1,9 +1,15 @@
 import unittest
 
 from collections import abc
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-from jpake import JPAKE
-from jpake.exceptions import OutOfSequenceError, DuplicateSignerError
+from jpake import JPAKE, NIST_80, NIST_112, NIST_128, ReplayCache
+from jpake.batch import batch_one
+from jpake.exceptions import (
+    OutOfSequenceError, DuplicateSignerError, InvalidProofError,
+    ReplayedProofError,
+)
 
 
 class JPAKETestCase(unittest.TestCase):
@@ -189,3 +195,325 @@ class JPAKETestCase(unittest.TestCase):
 
         with self.assertRaises(DuplicateSignerError):
             alice.process_one(mallory.one())
+
+
+class ComputeThreeTestCase(unittest.TestCase):
+    def _check_parameters(self, parameters):
+        p = parameters.p
+        q = parameters.q
+
+        for secret in ("hunter42", 12345, q + 17):
+            alice = JPAKE(
+                secret=secret, signer_id=b"alice", parameters=parameters,
+            )
+            bob = JPAKE(
+                secret=secret, signer_id=b"bob", parameters=parameters,
+            )
+
+            alice.process_one(bob.one()), bob.process_one(alice.one())
+            alice.process_two(bob.two()), bob.process_two(alice.two())
+
+            # Unfused computation of the key.
+            bottom = pow(
+                alice.remote_gx2, alice.x2 * (q - alice.secret) % q, p,
+            )
+            expected = pow((alice.remote_A * bottom) % p, alice.x2, p)
+
+            self.assertEqual(alice.K, expected)
+            self.assertEqual(alice.K, bob.K)
+
+    def test_nist_80(self):
+        self._check_parameters(NIST_80)
+
+    def test_nist_112(self):
+        self._check_parameters(NIST_112)
+
+    def test_nist_128(self):
+        self._check_parameters(NIST_128)
+
+
+class EagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.executor.shutdown)
+
+    def _pair(self, **kwargs):
+        alice = JPAKE(
+            signer_id=b"alice", parameters=NIST_80, executor=self.executor,
+            **kwargs
+        )
+        bob = JPAKE(signer_id=b"bob", parameters=NIST_80, **kwargs)
+        return alice, bob
+
+    def test_basic(self):
+        alice, bob = self._pair(secret="hunter42")
+
+        alice.process_one(bob.one()), bob.process_one(alice.one())
+        self.assertIsNotNone(alice._pending_two)
+
+        alice.process_two(bob.two()), bob.process_two(alice.two())
+        self.assertIsNotNone(alice._pending_three)
+
+        self.assertEqual(alice.K, bob.K)
+
+    def test_scheduled_after_secret(self):
+        alice, bob = self._pair()
+
+        alice.process_one(bob.one()), bob.process_one(alice.one())
+        self.assertIsNone(alice._pending_two)
+
+        alice.set_secret("hunter42")
+        bob.set_secret("hunter42")
+        self.assertIsNotNone(alice._pending_two)
+
+        alice.process_two(bob.two()), bob.process_two(alice.two())
+        self.assertEqual(alice.K, bob.K)
+
+    def test_two_reuses_background_result(self):
+        alice, bob = self._pair(secret="hunter42")
+        alice.process_one(bob.one())
+
+        A = alice.A
+        self.assertEqual(alice.two()['A'], A)
+        self.assertEqual(alice.two()['zkp_A'], dict(alice.zkp_A))
+
+    def test_get_A_before_secret(self):
+        alice, bob = self._pair()
+        alice.process_one(bob.one())
+
+        with self.assertRaises(AttributeError):
+            alice.A
+        self.assertRaises(OutOfSequenceError, alice.two)
+
+    def test_get_K_before_process_two(self):
+        alice, bob = self._pair(secret="hunter42")
+        alice.process_one(bob.one())
+
+        with self.assertRaises(AttributeError):
+            alice.K
+
+    def test_process_one_before_one(self):
+        alice, bob = self._pair(secret="hunter42")
+        bob_one = bob.one()
+
+        with mock.patch.object(
+            JPAKE, '_compute_one', autospec=True,
+            side_effect=JPAKE._compute_one,
+        ) as compute_one:
+            alice.process_one(bob_one)
+            alice_one = alice.one()
+            alice.two()
+
+        self.assertEqual(compute_one.call_count, 1)
+        self.assertEqual(alice_one['zkp_x1'], dict(alice.zkp_x1))
+        self.assertEqual(alice_one['zkp_x2'], dict(alice.zkp_x2))
+
+        bob.process_one(alice_one)
+        alice.process_two(bob.two()), bob.process_two(alice.two())
+        self.assertEqual(alice.K, bob.K)
+
+    def test_background_failure(self):
+        alice, bob = self._pair(secret="hunter42")
+        with mock.patch.object(
+            JPAKE, '_compute_two', side_effect=RuntimeError("failed"),
+        ):
+            alice.process_one(bob.one())
+            with self.assertRaises(RuntimeError):
+                alice.two()
+
+
+class DeterministicNonceTestCase(unittest.TestCase):
+    seed = b"0123456789abcdef"
+
+    def _session(self, **kwargs):
+        kwargs.setdefault('signer_id', b"alice")
+        kwargs.setdefault('x1', 1234)
+        kwargs.setdefault('x2', 5678)
+        return JPAKE(parameters=NIST_80, nonce_seed=self.seed, **kwargs)
+
+    def test_basic(self):
+        alice = self._session(secret="hunter42")
+        bob = JPAKE(
+            secret="hunter42", signer_id=b"bob", parameters=NIST_80,
+            nonce_seed=b"fedcba9876543210",
+        )
+
+        alice.process_one(bob.one()), bob.process_one(alice.one())
+        alice.process_two(bob.two()), bob.process_two(alice.two())
+        self.assertEqual(alice.K, bob.K)
+
+    def test_reproducible(self):
+        self.assertEqual(self._session().one(), self._session().one())
+
+    def test_no_rng_calls(self):
+        random = mock.Mock(wraps=self._session()._rng)
+        session = self._session(random=random)
+        random.reset_mock()
+
+        session.one()
+        random.randrange.assert_not_called()
+
+    def test_seed_changes_nonces(self):
+        alice = self._session()
+        other = JPAKE(
+            signer_id=b"alice", x1=1234, x2=5678, parameters=NIST_80,
+            nonce_seed=b"fedcba9876543210",
+        )
+        self.assertNotEqual(
+            alice.one()['zkp_x1']['gr'], other.one()['zkp_x1']['gr'],
+        )
+
+    def test_unique_across_contexts(self):
+        g = NIST_80.g
+        p = NIST_80.p
+
+        nonces = set()
+        count = 0
+        for signer_id in (b"alice", b"bob"):
+            session = self._session(signer_id=signer_id)
+            for generator in (g, pow(g, 2, p), pow(g, 3, p)):
+                for exponent in (1, 2, 1234, 5678, NIST_80.q - 1):
+                    gx = pow(generator, exponent, p)
+                    for context_gx in (gx, (gx * g) % p):
+                        nonces.add(session._zkp_nonce(
+                            generator, exponent, context_gx,
+                        ))
+                        count += 1
+        self.assertEqual(len(nonces), count)
+
+    def test_same_context(self):
+        alice = self._session()
+        self.assertEqual(
+            alice._zkp_nonce(NIST_80.g, 1234, alice.gx1),
+            alice._zkp_nonce(NIST_80.g, 1234, alice.gx1),
+        )
+
+    def test_nonce_in_range(self):
+        alice = self._session()
+        for exponent in range(1, 50):
+            nonce = alice._zkp_nonce(NIST_80.g, exponent, exponent)
+            self.assertTrue(0 <= nonce < NIST_80.q)
+
+    def test_short_seed(self):
+        with self.assertRaises(ValueError):
+            JPAKE(parameters=NIST_80, nonce_seed=b"short")
+
+
+class CompactTestCase(unittest.TestCase):
+    def _pair(self, **kwargs):
+        alice = JPAKE(
+            secret="hunter42", signer_id=b"alice", parameters=NIST_80,
+            compact=True, **kwargs
+        )
+        bob = JPAKE(
+            secret="hunter42", signer_id=b"bob", parameters=NIST_80,
+            compact=True, **kwargs
+        )
+        return alice, bob
+
+    def test_basic(self):
+        alice, bob = self._pair()
+
+        alice.process_one(bob.one()), bob.process_one(alice.one())
+        alice.process_two(bob.two()), bob.process_two(alice.two())
+        self.assertEqual(alice.K, bob.K)
+
+    def test_message(self):
+        alice, bob = self._pair()
+        one = alice.one()
+        self.assertEqual(set(one), {'gx1', 'gx2', 'zkp_x1_x2'})
+        self.assertEqual(one['zkp_x1_x2']['id'], b"alice")
+
+        with self.assertRaises(AttributeError):
+            alice.zkp_x1
+        with self.assertRaises(AttributeError):
+            JPAKE(parameters=NIST_80).zkp_x1_x2
+
+        bob.process_one(one)
+        self.assertEqual(bob.remote_zkp_x1_x2, one['zkp_x1_x2'])
+
+    def test_keyword_arguments(self):
+        alice, bob = self._pair()
+        one = alice.one()
+        bob.process_one(
+            remote_gx1=one['gx1'], remote_gx2=one['gx2'],
+            remote_zkp_x1_x2=one['zkp_x1_x2'],
+        )
+        bob.two()
+
+    def test_invalid_response(self):
+        alice, bob = self._pair()
+        one = alice.one()
+        one['zkp_x1_x2']['b'] += 1
+        self.assertRaises(InvalidProofError, bob.process_one, one)
+
+    def test_proof_binds_both_values(self):
+        alice, bob = self._pair()
+        one = alice.one()
+
+        swapped = dict(one, gx1=one['gx2'], gx2=one['gx1'])
+        self.assertRaises(InvalidProofError, bob.process_one, swapped)
+
+        altered = dict(one, gx2=(one['gx2'] * NIST_80.g) % NIST_80.p)
+        self.assertRaises(InvalidProofError, bob.process_one, altered)
+
+    def test_duplicate_signer_id(self):
+        alice = JPAKE(
+            secret="hunter42", signer_id=b"alice", parameters=NIST_80,
+            compact=True,
+        )
+        other = JPAKE(
+            secret="hunter42", signer_id=b"alice", parameters=NIST_80,
+            compact=True,
+        )
+        self.assertRaises(
+            DuplicateSignerError, alice.process_one, other.one(),
+        )
+
+    def test_replayed(self):
+        cache = ReplayCache()
+        alice, bob = self._pair(replay_cache=cache)
+        carol = JPAKE(
+            secret="hunter42", signer_id=b"carol", parameters=NIST_80,
+            compact=True, replay_cache=cache,
+        )
+        one = alice.one()
+        bob.process_one(one)
+        self.assertRaises(ReplayedProofError, carol.process_one, one)
+
+        # The combined proof is recorded once, covering both values.
+        self.assertEqual(len(cache), 1)
+
+    def test_mismatched_modes(self):
+        alice, _ = self._pair()
+        bob = JPAKE(secret="hunter42", signer_id=b"bob", parameters=NIST_80)
+        self.assertRaises(KeyError, bob.process_one, alice.one())
+        self.assertRaises(KeyError, alice.process_one, bob.one())
+
+    def test_batch_one(self):
+        sessions = [
+            JPAKE(
+                secret="hunter42", signer_id=b"alice", parameters=NIST_80,
+                compact=compact,
+            )
+            for compact in (True, False, True)
+        ]
+        batch_one(sessions)
+
+        for session in sessions:
+            bob = JPAKE(
+                secret="hunter42", signer_id=b"bob", parameters=NIST_80,
+                compact=session._compact,
+            )
+            bob.process_one(session.one())
+            session.process_one(bob.one())
+            session.process_two(bob.two()), bob.process_two(session.two())
+            self.assertEqual(session.K, bob.K)
+
+    def test_deterministic_nonce(self):
+        def one():
+            return JPAKE(
+                x1=1234, x2=5678, signer_id=b"alice", parameters=NIST_80,
+                compact=True, nonce_seed=b"0123456789abcdef",
+            ).one()
+        self.assertEqual(one(), one())
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import unittest
 
 from sympy.ntheory.primetest import isprime
@@ -19,6 +21,51 @@ class BaseParameterTestsMixin(object):
         self.assertTrue(isprime(self.parameters.q))
 
 
+class LazyParametersTestCase(unittest.TestCase):
+    def test_import_does_not_convert(self):
+        # Run in a fresh interpreter as this process will already have touched
+        # the parameter sets.
+        script = (
+            "import jpake\n"
+            "for params in (jpake.NIST_80, jpake.NIST_112, jpake.NIST_128):\n"
+            "    assert isinstance(params._p, bytes)\n"
+            "    assert isinstance(params._q, bytes)\n"
+            "    assert isinstance(params._g, bytes)\n"
+        )
+        subprocess.check_call([sys.executable, '-c', script])
+
+    def test_import_is_minimal(self):
+        script = (
+            "import sys\n"
+            "import jpake\n"
+            "for name in ('jpake.cache', 'jpake.tuning', 'json'):\n"
+            "    assert name not in sys.modules, name\n"
+            "from jpake.cache import ReplayCache\n"
+            "from jpake.tuning import Tuning\n"
+            "assert jpake.ReplayCache is ReplayCache\n"
+            "assert jpake.Tuning is Tuning\n"
+        )
+        subprocess.check_call([sys.executable, '-c', script])
+
+    def test_converted_on_access(self):
+        params = jpake.parameters.Parameters(p=b'\x17', q=b'\x0b', g=b'\x04')
+        self.assertEqual(params.p, 23)
+        self.assertEqual(params.q, 11)
+        self.assertEqual(params.g, 4)
+        self.assertIsInstance(params._p, int)
+
+    def test_generator_table_cached(self):
+        params = jpake.parameters.Parameters(p=23, q=11, g=4)
+        table = params.generator_table(3)
+        self.assertIs(params.generator_table(3), table)
+        self.assertIsNot(params.generator_table(4), table)
+        self.assertEqual(table.pow(7), pow(4, 7, 23))
+
+    def test_accepts_ints(self):
+        params = jpake.parameters.Parameters(p=23, q=11, g=4)
+        self.assertEqual((params.p, params.q, params.g), (23, 11, 4))
+
+
 class Nist80ParametersTestCase(BaseParameterTestsMixin, unittest.TestCase):
     parameters = jpake.parameters.NIST_80
 
@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import unittest
+
+from jpake import JPAKE, NIST_80
+from jpake.cache import SecretCache
+from jpake.exceptions import InvalidProofError
+from jpake.providers import (
+    ScryptKDF, SecretProvider, SecretResolver, SessionManager, derive_secret,
+)
+
+
+# Cheap enough to keep the tests fast.
+FAST_KDF = ScryptKDF(n=2**4, r=1, p=1)
+
+
+class DictProvider(SecretProvider):
+    def __init__(self, passwords):
+        self.passwords = passwords
+        self.lookups = 0
+
+    async def lookup(self, user_id):
+        self.lookups += 1
+        await asyncio.sleep(0)
+        return self.passwords.get(user_id)
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class DeriveSecretTestCase(unittest.TestCase):
+    def test_deterministic(self):
+        a = derive_secret(
+            "hunter42", salt=b"alice", parameters=NIST_80, kdf=FAST_KDF,
+        )
+        b = derive_secret(
+            b"hunter42", salt="alice", parameters=NIST_80, kdf=FAST_KDF,
+        )
+        self.assertEqual(a, b)
+        self.assertTrue(1 <= a < NIST_80.q)
+
+    def test_salted(self):
+        a = derive_secret(
+            "hunter42", salt=b"alice", parameters=NIST_80, kdf=FAST_KDF,
+        )
+        b = derive_secret(
+            "hunter42", salt=b"bob", parameters=NIST_80, kdf=FAST_KDF,
+        )
+        self.assertNotEqual(a, b)
+
+    def test_custom_kdf(self):
+        calls = []
+
+        def kdf(password, salt, length):
+            calls.append((password, salt, length))
+            return b'\x01' * length
+
+        derive_secret("pw", salt=b"s", parameters=NIST_80, kdf=kdf)
+        self.assertEqual(calls, [(b"pw", b"s", 28)])
+
+
+class SecretResolverTestCase(unittest.TestCase):
+    def test_resolve(self):
+        provider = DictProvider({b"alice": "hunter42"})
+        resolver = SecretResolver(
+            provider, parameters=NIST_80, kdf=FAST_KDF,
+        )
+        self.assertEqual(
+            _run(resolver.resolve("alice")),
+            derive_secret(
+                "hunter42", salt=b"alice", parameters=NIST_80, kdf=FAST_KDF,
+            ),
+        )
+
+    def test_cached(self):
+        kdf_threads = []
+
+        def kdf(password, salt, length):
+            kdf_threads.append(threading.current_thread())
+            return FAST_KDF(password, salt, length)
+
+        provider = DictProvider({b"alice": "hunter42"})
+        cache = SecretCache()
+        resolver = SecretResolver(
+            provider, parameters=NIST_80, kdf=kdf, cache=cache,
+        )
+        first = _run(resolver.resolve(b"alice"))
+        second = _run(resolver.resolve(b"alice"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(provider.lookups, 1)
+        self.assertEqual(len(kdf_threads), 1)
+        self.assertIsNot(kdf_threads[0], threading.current_thread())
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_cache_disabled(self):
+        provider = DictProvider({b"alice": "hunter42"})
+        resolver = SecretResolver(
+            provider, parameters=NIST_80, kdf=FAST_KDF, cache=False,
+        )
+        _run(resolver.resolve(b"alice"))
+        _run(resolver.resolve(b"alice"))
+        self.assertEqual(provider.lookups, 2)
+        self.assertIsNone(resolver.cache)
+
+    def test_unknown_user(self):
+        resolver = SecretResolver(
+            DictProvider({}), parameters=NIST_80, kdf=FAST_KDF,
+        )
+        with self.assertRaises(KeyError):
+            _run(resolver.resolve(b"mallory"))
+
+
+class SecretCacheTestCase(unittest.TestCase):
+    def test_expiry_and_invalidate(self):
+        now = [0.0]
+        cache = SecretCache(ttl=10, clock=lambda: now[0])
+        cache.put(b"alice", 1)
+        cache.put(b"bob", 2)
+        self.assertEqual(cache.get(b"alice"), 1)
+
+        cache.invalidate(b"alice")
+        self.assertIsNone(cache.get(b"alice"))
+
+        now[0] = 11
+        self.assertIsNone(cache.get(b"bob"))
+
+    def test_least_recently_used_evicted(self):
+        cache = SecretCache(max_entries=2)
+        cache.put(b"alice", 1)
+        cache.put(b"bob", 2)
+        cache.get(b"alice")
+        cache.put(b"carol", 3)
+        self.assertEqual(cache.get(b"alice"), 1)
+        self.assertIsNone(cache.get(b"bob"))
+
+
+class SessionManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.resolver = SecretResolver(
+            DictProvider({b"alice": "hunter42"}),
+            parameters=NIST_80, kdf=FAST_KDF,
+        )
+        self.manager = SessionManager(self.resolver, signer_id=b"server")
+
+    def _client(self):
+        secret = derive_secret(
+            "hunter42", salt=b"alice", parameters=NIST_80, kdf=FAST_KDF,
+        )
+        return JPAKE(secret=secret, signer_id=b"alice", parameters=NIST_80)
+
+    def test_handshake(self):
+        client = self._client()
+        server, server_one = _run(self.manager.start(b"alice", client.one()))
+
+        client.process_one(server_one)
+        client.process_two(server.two()), server.process_two(client.two())
+        self.assertEqual(client.K, server.K)
+
+    def test_finish(self):
+        client = self._client()
+        server, server_one = _run(self.manager.start(b"alice", client.one()))
+
+        client.process_one(server_one)
+        server_two = _run(self.manager.finish(server, client.two()))
+        client.process_two(server_two)
+        self.assertEqual(client.K, server.K)
+
+    def test_finish_invalid_proof(self):
+        client = self._client()
+        server, server_one = _run(self.manager.start(b"alice", client.one()))
+
+        client.process_one(server_one)
+        two = client.two()
+        two['zkp_A']['b'] += 1
+        with self.assertRaises(InvalidProofError):
+            _run(self.manager.finish(server, two))
+
+    def test_unknown_user(self):
+        with self.assertRaises(KeyError):
+            _run(self.manager.start(b"mallory", self._client().one()))
+
+    def test_invalid_proof(self):
+        one = self._client().one()
+        one['zkp_x1']['b'] += 1
+        with self.assertRaises(InvalidProofError):
+            _run(self.manager.start(b"alice", one))
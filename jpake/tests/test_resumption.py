@@ -0,0 +1,203 @@
+import time
+import unittest
+
+from jpake import JPAKE, NIST_80
+from jpake.cache import ReplayCache
+from jpake.exceptions import InvalidTicketError, OutOfSequenceError
+from jpake.resumption import (
+    ResumeClient, TicketIssuer, resumption_secret,
+)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _handshake():
+    alice = JPAKE(secret="hunter42", signer_id=b"alice", parameters=NIST_80)
+    bob = JPAKE(secret="hunter42", signer_id=b"bob", parameters=NIST_80)
+    alice.process_one(bob.one()), bob.process_one(alice.one())
+    alice.process_two(bob.two()), bob.process_two(alice.two())
+    return alice, bob
+
+
+class ResumptionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.issuer = TicketIssuer(lifetime=3600, clock=self.clock)
+        self.client, self.server = _handshake()
+        self.ticket = self.issuer.issue(
+            resumption_secret(self.server), peer_id=b"alice",
+        )
+
+    def _resume(self, ticket=None, secret=None):
+        if ticket is None:
+            ticket = self.ticket
+        if secret is None:
+            secret = resumption_secret(self.client)
+        client = ResumeClient(ticket=ticket, secret=secret)
+        server, reply = self.issuer.resume(client.hello())
+        client.process_reply(reply)
+        server.process_confirm(client.confirm())
+        return client, server
+
+    def test_secret_matches(self):
+        self.assertEqual(
+            resumption_secret(self.client), resumption_secret(self.server),
+        )
+
+    def test_resume(self):
+        client, server = self._resume()
+        self.assertEqual(client.K, server.K)
+        self.assertEqual(server.peer_id, b"alice")
+
+    def test_fresh_keys(self):
+        self.issuer = TicketIssuer(replay_cache=False, clock=self.clock)
+        self.ticket = self.issuer.issue(resumption_secret(self.server))
+        first, _ = self._resume()
+        second, _ = self._resume()
+        self.assertNotEqual(first.K, second.K)
+
+    def test_chained(self):
+        client, server = self._resume()
+        ticket = self.issuer.issue(resumption_secret(server))
+        client, server = self._resume(ticket, resumption_secret(client))
+        self.assertEqual(client.K, server.K)
+
+    def test_wrong_secret(self):
+        client = ResumeClient(ticket=self.ticket, secret=b"\x00" * 32)
+        _, reply = self.issuer.resume(client.hello())
+        with self.assertRaises(InvalidTicketError):
+            client.process_reply(reply)
+
+    def test_tampered(self):
+        for index in (0, 10, 30, len(self.ticket) - 1):
+            ticket = bytearray(self.ticket)
+            ticket[index] ^= 1
+            with self.assertRaises(InvalidTicketError):
+                self.issuer.open(bytes(ticket))
+
+    def test_truncated(self):
+        with self.assertRaises(InvalidTicketError):
+            self.issuer.open(self.ticket[:40])
+
+    def test_expired(self):
+        self.clock.now += 3601
+        with self.assertRaises(InvalidTicketError):
+            self.issuer.open(self.ticket)
+
+    def test_other_issuer(self):
+        with self.assertRaises(InvalidTicketError):
+            TicketIssuer(clock=self.clock).open(self.ticket)
+
+    def test_shared_key(self):
+        key = b"k" * 32
+        one = TicketIssuer(key=key, clock=self.clock)
+        two = TicketIssuer(key=key, clock=self.clock)
+        ticket = one.issue(b"s" * 32, peer_id=b"alice")
+        self.assertEqual(two.open(ticket), (b"s" * 32, b"alice"))
+
+    def test_rotation(self):
+        self.issuer.rotate()
+        new_ticket = self.issuer.issue(b"s" * 32)
+        self.assertNotEqual(new_ticket[:8], self.ticket[:8])
+
+        # Tickets from the previous key are valid until they expire.
+        self.issuer.open(self.ticket)
+
+        self.clock.now += 3601
+        self.issuer.rotate()
+        with self.assertRaises(InvalidTicketError):
+            self.issuer.open(self.ticket)
+
+    def test_single_use(self):
+        self._resume()
+        with self.assertRaises(InvalidTicketError):
+            self._resume()
+
+    def test_shared_replay_cache(self):
+        key = b"k" * 32
+        cache = ReplayCache(ttl=3600)
+        one = TicketIssuer(key=key, replay_cache=cache, clock=self.clock)
+        two = TicketIssuer(key=key, replay_cache=cache, clock=self.clock)
+        ticket = one.issue(b"s" * 32)
+        one.open(ticket)
+        with self.assertRaises(InvalidTicketError):
+            two.open(ticket)
+
+    def test_reusable(self):
+        issuer = TicketIssuer(replay_cache=False, clock=self.clock)
+        self.assertIsNone(issuer.replay_cache)
+        ticket = issuer.issue(b"s" * 32)
+        issuer.open(ticket)
+        issuer.open(ticket)
+
+    def test_server_K_before_confirm(self):
+        client = ResumeClient(
+            ticket=self.ticket, secret=resumption_secret(self.client),
+        )
+        server, reply = self.issuer.resume(client.hello())
+        client.process_reply(reply)
+        with self.assertRaises(AttributeError):
+            server.K
+
+    def test_wrong_client_confirmation(self):
+        # A stolen ticket is not enough to resume the session without the
+        # secret sealed inside it.
+        client = ResumeClient(ticket=self.ticket, secret=b"\x00" * 32)
+        server, reply = self.issuer.resume(client.hello())
+        with self.assertRaises(InvalidTicketError):
+            server.process_confirm({'confirm': b"\x00" * 32})
+        with self.assertRaises(AttributeError):
+            server.K
+
+    def test_process_confirm_twice(self):
+        client, server = self._resume()
+        with self.assertRaises(OutOfSequenceError):
+            server.process_confirm(client.confirm())
+
+    def test_confirm_before_reply(self):
+        client = ResumeClient(
+            ticket=self.ticket, secret=resumption_secret(self.client),
+        )
+        with self.assertRaises(OutOfSequenceError):
+            client.confirm()
+
+    def test_process_reply_twice(self):
+        client = ResumeClient(
+            ticket=self.ticket, secret=resumption_secret(self.client),
+        )
+        _, reply = self.issuer.resume(client.hello())
+        client.process_reply(reply)
+        with self.assertRaises(OutOfSequenceError):
+            client.process_reply(reply)
+
+    def test_K_before_reply(self):
+        client = ResumeClient(
+            ticket=self.ticket, secret=resumption_secret(self.client),
+        )
+        with self.assertRaises(AttributeError):
+            client.K
+
+    def test_cheaper_than_handshake(self):
+        def best_of(fn, repeat=5):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+            return min(times)
+
+        self.issuer = TicketIssuer(replay_cache=False, clock=self.clock)
+        self.ticket = self.issuer.issue(resumption_secret(self.server))
+
+        full = best_of(_handshake)
+        resumed = best_of(self._resume)
+
+        # Even for the smallest parameter set a resumption should cost a
+        # small fraction of a full handshake.
+        self.assertLess(resumed, full / 10)
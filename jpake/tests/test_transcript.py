@@ -0,0 +1,244 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from jpake import JPAKE, NIST_80, _default_zkp_hash_fn
+from jpake.exceptions import (
+    CorruptTranscriptError, InvalidProofError, OutOfSequenceError,
+)
+from jpake.parameters import Parameters
+from jpake.transcript import (
+    MAGIC, TranscriptWriter, decode_transcript, encode_transcript,
+    read_transcripts, verify_transcripts,
+)
+
+
+def _handshake(**kwargs):
+    alice = JPAKE(
+        secret="hunter42", signer_id=b"alice", parameters=NIST_80, **kwargs
+    )
+    bob = JPAKE(
+        secret="hunter42", signer_id=b"bob", parameters=NIST_80, **kwargs
+    )
+    alice.process_one(bob.one()), bob.process_one(alice.one())
+    alice.process_two(bob.two()), bob.process_two(alice.two())
+    return alice, bob
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class TranscriptTestCase(unittest.TestCase):
+    def test_public_values_only(self):
+        alice, _ = _handshake()
+        transcript = alice.transcript()
+
+        self.assertEqual(transcript['signer_id'], b"alice")
+        self.assertEqual(transcript['remote_zkp_A']['id'], b"bob")
+        self.assertIn('zkp_x1', transcript)
+        self.assertIn('A', transcript)
+
+        def values(value):
+            if isinstance(value, dict):
+                for item in value.values():
+                    yield from values(item)
+            else:
+                yield value
+
+        private = {alice.x1, alice.x2, alice.secret, alice.K}
+        self.assertFalse(private & set(values(transcript)))
+
+    def test_before_process_one(self):
+        with self.assertRaises(OutOfSequenceError):
+            JPAKE(parameters=NIST_80).transcript()
+
+    def test_partial(self):
+        alice = JPAKE(signer_id=b"alice", parameters=NIST_80)
+        bob = JPAKE(signer_id=b"bob", parameters=NIST_80)
+        alice.process_one(bob.one())
+
+        transcript = alice.transcript()
+        self.assertIn('remote_zkp_x2', transcript)
+        self.assertNotIn('A', transcript)
+        self.assertNotIn('remote_A', transcript)
+
+    def test_round_trip(self):
+        alice, _ = _handshake()
+        transcript = alice.transcript()
+        encoded = encode_transcript(transcript)
+        self.assertEqual(decode_transcript(encoded), transcript)
+
+        # Builtin parameter sets are recorded by name.
+        self.assertNotIn(NIST_80.p.to_bytes(128, 'big'), encoded)
+
+    def test_round_trip_custom_parameters(self):
+        parameters = Parameters(p=NIST_80.p, q=NIST_80.q, g=NIST_80.g)
+        transcript = dict(_handshake()[0].transcript(), g=parameters.g ** 2)
+        self.assertEqual(
+            decode_transcript(encode_transcript(transcript)), transcript,
+        )
+
+    def test_compact(self):
+        alice, _ = _handshake(compact=True)
+        transcript = alice.transcript()
+        self.assertIn('remote_zkp_x1_x2', transcript)
+        self.assertNotIn('remote_zkp_x1', transcript)
+
+
+class TranscriptLogTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.directory = directory
+        self.path = os.path.join(directory, 'transcripts.log')
+
+    def _write(self, transcripts, path=None):
+        with TranscriptWriter(path or self.path) as writer:
+            for transcript in transcripts:
+                writer.append(transcript)
+
+    def _verify(self, paths, **kwargs):
+        kwargs.setdefault('executor', ThreadPoolExecutor(max_workers=2))
+        try:
+            return list(verify_transcripts(paths, **kwargs))
+        finally:
+            kwargs['executor'].shutdown()
+
+    def test_append(self):
+        first = _handshake()[0].transcript()
+        second = _handshake()[1].transcript()
+        self._write([first])
+        self._write([second])
+
+        with open(self.path, 'rb') as log:
+            self.assertEqual(log.read(len(MAGIC)), MAGIC)
+        self.assertEqual(list(read_transcripts(self.path)), [first, second])
+
+    def test_not_a_log(self):
+        with open(self.path, 'wb') as log:
+            log.write(b"hello world\n")
+        with self.assertRaises(CorruptTranscriptError):
+            list(read_transcripts(self.path))
+
+    def test_corrupt(self):
+        self._write([_handshake()[0].transcript()])
+        with open(self.path, 'r+b') as log:
+            log.seek(100)
+            byte = log.read(1)
+            log.seek(100)
+            log.write(bytes([byte[0] ^ 1]))
+
+        with self.assertRaises(CorruptTranscriptError):
+            list(read_transcripts(self.path))
+
+    def test_truncated(self):
+        first = _handshake()[0].transcript()
+        self._write([first, first])
+        with open(self.path, 'r+b') as log:
+            log.truncate(os.path.getsize(self.path) - 3)
+
+        transcripts = read_transcripts(self.path)
+        self.assertEqual(next(transcripts), first)
+        with self.assertRaises(CorruptTranscriptError):
+            next(transcripts)
+
+    def test_verify_valid(self):
+        transcripts = []
+        for compact in (False, True, False):
+            alice, bob = _handshake(compact=compact)
+            transcripts.extend((alice.transcript(), bob.transcript()))
+        self._write(transcripts)
+
+        self.assertEqual(self._verify([self.path], batch_size=4), [])
+
+    def test_verify_reports_failures(self):
+        transcripts = [_handshake()[0].transcript() for _ in range(5)]
+        transcripts[1]['remote_zkp_x2']['b'] += 1
+        transcripts[3]['remote_zkp_A']['id'] = b"alice"
+        del transcripts[4]['remote_zkp_x1']
+
+        compact = _handshake(compact=True)[0].transcript()
+        compact['remote_zkp_x1_x2']['b'] += 1
+        transcripts.append(compact)
+
+        self._write(transcripts)
+
+        failures = self._verify([self.path], batch_size=4)
+        self.assertEqual(
+            [(path, index) for path, index, _, _ in failures],
+            [(self.path, 1), (self.path, 3), (self.path, 4), (self.path, 5)],
+        )
+        self.assertEqual(failures[0][2], transcripts[1])
+
+    def test_verify_negated_commitments(self):
+        p, q, g = NIST_80.p, NIST_80.q, NIST_80.g
+        alice = JPAKE(signer_id=b"alice", parameters=NIST_80)
+        bob = JPAKE(signer_id=b"bob", parameters=NIST_80)
+        alice.process_one(bob.one())
+        transcript = alice.transcript()
+
+        # Replace both of bob's step one proofs with ones committing to
+        # ``-g^r``, which cancel out if combined with odd weights.
+        for x, name in ((bob.x1, 'remote_zkp_x1'), (bob.x2, 'remote_zkp_x2')):
+            gx = pow(g, x, p)
+            r = 12345
+            gr = p - pow(g, r, p)
+            h = _default_zkp_hash_fn(g=g, gr=gr, gx=gx, signer_id=b"bob")
+            transcript[name] = {'gr': gr, 'b': (r - x * h) % q, 'id': b"bob"}
+
+        verifier = JPAKE(signer_id=b"alice", parameters=NIST_80)
+        with self.assertRaises(InvalidProofError):
+            verifier.process_one(
+                remote_gx1=transcript['remote_gx1'],
+                remote_gx2=transcript['remote_gx2'],
+                remote_zkp_x1=transcript['remote_zkp_x1'],
+                remote_zkp_x2=transcript['remote_zkp_x2'],
+            )
+
+        self._write([transcript])
+        failures = self._verify([self.path])
+        self.assertEqual([failure[1] for failure in failures], [0])
+
+    def test_verify_several_logs(self):
+        other = os.path.join(self.directory, 'other.log')
+        bad = _handshake()[0].transcript()
+        bad['remote_A'] += 1
+        self._write([_handshake()[0].transcript()])
+        self._write([bad], path=other)
+
+        failures = self._verify([self.path, other])
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0][:2], (other, 0))
+
+    def test_bounded(self):
+        bad = _handshake()[0].transcript()
+        bad['remote_zkp_x1']['b'] += 1
+        self._write([bad] * 20)
+
+        executor = CountingExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        failures = verify_transcripts(
+            [self.path], executor=executor, batch_size=1, max_pending=3,
+        )
+        next(failures)
+        self.assertLessEqual(executor.submitted, 3)
+        self.assertEqual(len(list(failures)), 19)
+
+    def test_process_pool(self):
+        bad = _handshake()[0].transcript()
+        bad['remote_zkp_x1']['gr'] += 1
+        self._write([_handshake()[0].transcript(), bad])
+
+        executor = ProcessPoolExecutor(max_workers=2)
+        failures = self._verify([self.path], executor=executor, batch_size=1)
+        self.assertEqual([failure[1] for failure in failures], [1])
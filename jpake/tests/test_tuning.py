@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from random import Random
+from unittest import mock
+
+import jpake.tuning
+
+from jpake import JPAKE
+from jpake.parameters import NIST_80, Parameters
+from jpake.tuning import Tuning, calibrate, get_tuning
+
+
+class TuningTestCase(unittest.TestCase):
+    def test_defaults(self):
+        tuning = Tuning()
+        self.assertEqual(tuning, Tuning(**tuning.as_dict()))
+
+    def test_parse(self):
+        self.assertEqual(
+            Tuning.parse("fixed_base_window=6, multi_window=3"),
+            Tuning(fixed_base_window=6, multi_window=3),
+        )
+
+    def test_parse_unknown(self):
+        with self.assertRaises(ValueError):
+            Tuning.parse("comb_size=3")
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            Tuning(multi_window=0)
+
+
+class CalibrationTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'tuning.json')
+
+        # Start each test with nothing loaded and no overrides.
+        patcher = mock.patch.dict(jpake.tuning._loaded, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.dict(
+            os.environ, {'JPAKE_TUNING_CACHE': self.path},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop('JPAKE_TUNING', None)
+
+    def test_calibrate_saves(self):
+        tuning = calibrate(
+            NIST_80, candidates=(3, 4), repeat=1, random=Random(0),
+        )
+        for window in tuning.as_dict().values():
+            self.assertIn(window, (3, 4))
+
+        with open(self.path) as cache_file:
+            self.assertEqual(list(json.load(cache_file).values()), [
+                tuning.as_dict(),
+            ])
+
+        self.assertEqual(get_tuning(NIST_80), tuning)
+
+    def test_calibrate_no_save(self):
+        calibrate(NIST_80, candidates=(3,), repeat=1, save=False)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_picked_up_by_jpake(self):
+        tuning = calibrate(NIST_80, candidates=(2,), repeat=1)
+        alice = JPAKE(parameters=NIST_80)
+        self.assertEqual(alice._tuning, tuning)
+
+    def test_keyed_by_parameters(self):
+        calibrate(NIST_80, candidates=(2,), repeat=1)
+        other = Parameters(p=NIST_80.p, q=NIST_80.q, g=pow(NIST_80.g, 2))
+        self.assertEqual(get_tuning(other), Tuning())
+
+    def test_corrupt_cache(self):
+        with open(self.path, 'w') as cache_file:
+            cache_file.write("not json")
+        self.assertEqual(get_tuning(NIST_80), Tuning())
+
+    def test_environment_override(self):
+        calibrate(NIST_80, candidates=(2,), repeat=1)
+        with mock.patch.dict(os.environ, {'JPAKE_TUNING': 'multi_window=7'}):
+            self.assertEqual(get_tuning(NIST_80), Tuning(multi_window=7))
+
+    def test_invalid_environment_override(self):
+        tuning = calibrate(NIST_80, candidates=(2,), repeat=1)
+        with mock.patch.dict(os.environ, {'JPAKE_TUNING': 'bogus'}), \
+                mock.patch.object(jpake.tuning, '_rejected', set()):
+            with self.assertLogs('jpake.tuning', 'WARNING'):
+                self.assertEqual(get_tuning(NIST_80), tuning)
+
+            # Only warned about once, and handshakes still work.
+            with mock.patch.object(jpake.tuning._logger, 'warning') as warn:
+                self.assertEqual(JPAKE(parameters=NIST_80)._tuning, tuning)
+            warn.assert_not_called()
+
+            os.unlink(self.path)
+            jpake.tuning._loaded.clear()
+            self.assertEqual(get_tuning(NIST_80), Tuning())
+
+    def test_explicit_override(self):
+        calibrate(NIST_80, candidates=(2,), repeat=1)
+        tuning = Tuning(fixed_base_window=3)
+        alice = JPAKE(parameters=NIST_80, tuning=tuning)
+        self.assertIs(alice._tuning, tuning)
+
+
+class TunedHandshakeTestCase(unittest.TestCase):
+    def test_windows(self):
+        for window in (1, 3, 6):
+            tuning = Tuning(
+                fixed_base_window=window, session_window=window,
+                multi_window=window,
+            )
+            alice = JPAKE(
+                secret="hunter42", signer_id=b"alice", parameters=NIST_80,
+                tuning=tuning,
+            )
+            bob = JPAKE(
+                secret="hunter42", signer_id=b"bob", parameters=NIST_80,
+            )
+            alice.process_one(bob.one()), bob.process_one(alice.one())
+            alice.process_two(bob.two()), bob.process_two(alice.two())
+            self.assertEqual(alice.K, bob.K)
+            self.assertEqual(alice.gx1, pow(NIST_80.g, alice.x1, NIST_80.p))
@@ -0,0 +1,400 @@
+"""
+Recording of handshakes for later audit, and bulk re-verification of the
+proofs that were accepted.
+
+Transcripts, as returned by :meth:`jpake.JPAKE.transcript`, contain public
+values only.  They are appended to a log file by a :class:`TranscriptWriter`
+in a simple binary format: an eight byte header followed by records made of a
+four byte big-endian length, the encoded transcript, and a CRC32 of the
+encoded transcript.  Records are only ever appended, so logs can be rotated
+and shipped like any other log file.
+
+:func:`verify_transcripts` streams one or more logs through a pool of worker
+processes in batches of transcripts, and yields any that fail.  Each worker
+checks every proof on its own with :func:`~jpake.batch.verify_zkps`, using
+tables of powers of the generators shared across the batch.  Only a bounded
+number of batches are held in memory at once, so logs of any size can be
+processed.
+For example::
+
+    for path, index, transcript, reason in verify_transcripts(paths):
+        print("%s:%d: %s" % (path, index, reason))
+"""
+import os
+import threading
+import zlib
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from jpake import _compact_zkp_hash_fn, _default_zkp_hash_fn
+from jpake.batch import verify_zkps
+from jpake.exponentiation import multi_pow
+from jpake.parameters import NIST_80, NIST_112, NIST_128
+from jpake.exceptions import CorruptTranscriptError, InvalidProofError
+
+
+#: Written at the start of every log file.
+MAGIC = b"JPAKETX\x01"
+
+_MAX_RECORD_LENGTH = 2**24
+
+# Parameter sets that are recorded by name rather than by value.
+_NAMED_PARAMETERS = {
+    b'NIST_80': NIST_80,
+    b'NIST_112': NIST_112,
+    b'NIST_128': NIST_128,
+}
+
+_INT = b'i'
+_BYTES = b'b'
+_DICT = b'd'
+
+
+def _encode_fields(fields):
+    parts = []
+    for name, value in sorted(fields.items()):
+        name = name.encode('ascii')
+        if isinstance(value, int):
+            kind = _INT
+            value = value.to_bytes(
+                (value.bit_length() + 8) // 8, 'big', signed=True,
+            )
+        elif isinstance(value, bytes):
+            kind = _BYTES
+        elif isinstance(value, dict):
+            kind = _DICT
+            value = _encode_fields(value)
+        else:
+            raise TypeError("can't encode %r" % (value,))
+        parts.append(b"".join((
+            len(name).to_bytes(1, 'big'), name,
+            kind, len(value).to_bytes(4, 'big'), value,
+        )))
+    return b"".join(parts)
+
+
+def _decode_fields(data):
+    fields = {}
+    offset = 0
+    while offset < len(data):
+        name_length = data[offset]
+        offset += 1
+        name = data[offset:offset + name_length].decode('ascii')
+        offset += name_length
+        kind = data[offset:offset + 1]
+        length = int.from_bytes(data[offset + 1:offset + 5], 'big')
+        offset += 5
+        value = data[offset:offset + length]
+        if len(value) != length:
+            raise CorruptTranscriptError("field %r truncated" % name)
+        offset += length
+
+        if kind == _INT:
+            value = int.from_bytes(value, 'big', signed=True)
+        elif kind == _DICT:
+            value = _decode_fields(value)
+        elif kind != _BYTES:
+            raise CorruptTranscriptError("unknown field type %r" % kind)
+        fields[name] = value
+    return fields
+
+
+def encode_transcript(transcript):
+    """Returns the binary encoding of ``transcript``."""
+    fields = dict(transcript)
+
+    group = (fields.get('p'), fields.get('q'), fields.get('g'))
+    for name, parameters in _NAMED_PARAMETERS.items():
+        if group == (parameters.p, parameters.q, parameters.g):
+            del fields['p'], fields['q'], fields['g']
+            fields['parameters'] = name
+            break
+
+    return _encode_fields(fields)
+
+
+def decode_transcript(data):
+    """Reverses :func:`encode_transcript`.
+
+    :raises CorruptTranscriptError:
+        If ``data`` is not a valid encoding.
+    """
+    try:
+        fields = _decode_fields(data)
+    except (IndexError, UnicodeDecodeError) as e:
+        raise CorruptTranscriptError("malformed transcript") from e
+
+    name = fields.pop('parameters', None)
+    if name is not None:
+        try:
+            parameters = _NAMED_PARAMETERS[name]
+        except KeyError:
+            raise CorruptTranscriptError(
+                "unknown parameters %r" % name
+            ) from None
+        fields['p'] = parameters.p
+        fields['q'] = parameters.q
+        fields['g'] = parameters.g
+    return fields
+
+
+class TranscriptWriter(object):
+    """
+    Appends transcripts to a log file.  A single writer can safely be
+    shared between threads.
+
+    :param path:
+        The log file.  Created if it does not exist.
+    :param sync:
+        If ``True`` each record is flushed to disk with :func:`os.fsync`
+        before :meth:`append` returns.
+    """
+    __slots__ = ['path', 'sync', '_file', '_lock']
+
+    def __init__(self, path, *, sync=False):
+        self.path = path
+        self.sync = sync
+        self._lock = threading.Lock()
+
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+
+    def append(self, transcript):
+        """Writes ``transcript`` to the end of the log.
+
+        :param transcript:
+            A dictionary returned by :meth:`jpake.JPAKE.transcript`.
+        """
+        payload = encode_transcript(transcript)
+        if len(payload) > _MAX_RECORD_LENGTH:
+            raise ValueError("transcript too large")
+        record = b"".join((
+            len(payload).to_bytes(4, 'big'),
+            payload,
+            zlib.crc32(payload).to_bytes(4, 'big'),
+        ))
+
+        with self._lock:
+            self._file.write(record)
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_records(path):
+    """
+    Generator yielding the encoded transcripts in the log at ``path``, with
+    their checksums verified, in the order they were written.
+
+    :raises CorruptTranscriptError:
+        If the log is damaged.  Records before the damage will already have
+        been yielded.
+    """
+    with open(path, 'rb') as log:
+        if log.read(len(MAGIC)) != MAGIC:
+            raise CorruptTranscriptError("%s is not a transcript log" % path)
+
+        while True:
+            header = log.read(4)
+            if not header:
+                return
+            length = int.from_bytes(header, 'big')
+            if len(header) != 4 or length > _MAX_RECORD_LENGTH:
+                raise CorruptTranscriptError("bad record header")
+
+            payload = log.read(length)
+            checksum = log.read(4)
+            if len(payload) != length or len(checksum) != 4:
+                raise CorruptTranscriptError("record truncated")
+            if zlib.crc32(payload) != int.from_bytes(checksum, 'big'):
+                raise CorruptTranscriptError("checksum mismatch")
+
+            yield payload
+
+
+def read_transcripts(path):
+    """Generator yielding the decoded transcripts in the log at ``path``.
+    """
+    for payload in read_records(path):
+        yield decode_transcript(payload)
+
+
+def _statements(transcript):
+    """
+    Returns a ``(p, statements, compact)`` tuple for the peer proofs in
+    ``transcript``, where ``statements`` is a list of arguments for
+    :func:`~jpake.batch.verify_zkps` and ``compact`` is a combined
+    step one proof, or ``None``.
+
+    :raises InvalidProofError:
+        If the transcript is missing proofs or has been tampered with in a
+        way that doesn't need any exponentiation to spot.
+    """
+    p = transcript['p']
+    g = transcript['g']
+    signer_id = transcript['signer_id']
+
+    remote_gx1 = transcript['remote_gx1'] % p
+    remote_gx2 = transcript['remote_gx2'] % p
+    if remote_gx2 == 1:
+        raise InvalidProofError("remote_gx2 is one")
+
+    statements = []
+    compact = transcript.get('remote_zkp_x1_x2')
+    if compact is None:
+        statements.append((g, remote_gx1, transcript['remote_zkp_x1']))
+        statements.append((g, remote_gx2, transcript['remote_zkp_x2']))
+    else:
+        compact = (remote_gx1, remote_gx2, compact)
+
+    if 'remote_A' in transcript:
+        generator = (
+            transcript['gx1'] * transcript['gx2'] * remote_gx1
+        ) % p
+        statements.append((
+            generator, transcript['remote_A'], transcript['remote_zkp_A'],
+        ))
+
+    for _, _, zkp in statements:
+        if zkp['id'] == signer_id:
+            raise InvalidProofError("peer used the same signer id")
+    if compact is not None and compact[2]['id'] == signer_id:
+        raise InvalidProofError("peer used the same signer id")
+
+    return p, statements, compact
+
+
+def _verify_compact(transcript, gx1, gx2, zkp, *, window):
+    p = transcript['p']
+    g = transcript['g']
+    gr = zkp['gr']
+    c1, c2 = _compact_zkp_hash_fn(
+        g=g, gr=gr, gx1=gx1, gx2=gx2, signer_id=zkp['id'],
+    )
+    expected = multi_pow(
+        ((g, zkp['b']), (gx1, c1), (gx2, c2)), p, window=window,
+    )
+    if gr != expected:
+        raise InvalidProofError()
+
+
+def _describe(error):
+    return str(error) or type(error).__name__
+
+
+def _verify_batch(batch, zkp_hash, window):
+    """
+    Verifies a batch of ``(index, payload)`` pairs, returning a list of
+    ``(index, transcript, reason)`` tuples for those that fail.
+    """
+    failures = []
+
+    # Tables of powers of each generator, keyed by modulus, shared by every
+    # transcript in the batch.
+    tables = {}
+    for index, payload in batch:
+        transcript = None
+        try:
+            transcript = decode_transcript(payload)
+            p, statements, compact = _statements(transcript)
+            if compact is not None:
+                _verify_compact(transcript, *compact, window=window)
+            verify_zkps(
+                statements, p=p, zkp_hash=zkp_hash, window=window,
+                tables=tables.setdefault(p, {}),
+            )
+        except (CorruptTranscriptError, InvalidProofError, KeyError) as e:
+            failures.append((index, transcript, _describe(e)))
+    return failures
+
+
+def _batches(paths, batch_size):
+    for path in paths:
+        batch = []
+        for index, payload in enumerate(read_records(path)):
+            batch.append((index, payload))
+            if len(batch) >= batch_size:
+                yield path, batch
+                batch = []
+        if batch:
+            yield path, batch
+
+
+def verify_transcripts(
+    paths, *, executor=None, processes=None, batch_size=256,
+    max_pending=None, zkp_hash=None, window=4
+):
+    """
+    Re-verifies the peer proofs recorded in the transcript logs at
+    ``paths``.
+
+    :param paths:
+        An iterable of log file paths.
+    :param executor:
+        The :class:`concurrent.futures.Executor` to verify batches in.
+        Defaults to a new :class:`~concurrent.futures.ProcessPoolExecutor`
+        with ``processes`` workers, which is shut down when done.
+    :param batch_size:
+        The number of transcripts sent to a worker at once.  The proofs from
+        a batch share tables of powers of their generators.
+    :param max_pending:
+        The maximum number of batches read but not yet verified.  Defaults
+        to twice the number of workers.
+    :param zkp_hash:
+        The hash function the proofs were made with.  Must be picklable.
+
+    :returns:
+        A generator yielding a ``(path, index, transcript, reason)`` tuple
+        for each transcript that fails, in log order.  ``index`` counts
+        records from zero.  ``transcript`` is ``None`` if the record could
+        not be decoded.
+
+    :raises CorruptTranscriptError:
+        If a log is damaged.  Failures found in earlier records will already
+        have been yielded.
+    """
+    if zkp_hash is None:
+        zkp_hash = _default_zkp_hash_fn
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=processes)
+        if processes is None:
+            processes = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * (processes or os.cpu_count() or 1)
+
+    pending = deque()
+    try:
+        for path, batch in _batches(paths, batch_size):
+            pending.append((path, executor.submit(
+                _verify_batch, batch, zkp_hash, window,
+            )))
+            while len(pending) >= max_pending:
+                yield from _report(*pending.popleft())
+
+        while pending:
+            yield from _report(*pending.popleft())
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
+def _report(path, future):
+    for index, transcript, reason in future.result():
+        yield path, index, transcript, reason
@@ -0,0 +1,314 @@
+"""
+Selection of window sizes for the exponentiation routines used by
+:class:`jpake.JPAKE`.
+
+The best window sizes depend on the size of the modulus and exponents, on the
+big integer implementation and on the machine, so rather than hard coding
+them they can be measured with :func:`calibrate`.  Results are saved to a
+small JSON file that is read by :func:`get_tuning`, and so picked up by any
+:class:`~jpake.JPAKE` instances created afterwards, in this process or later
+ones.
+
+The cache file defaults to ``$XDG_CACHE_HOME/jpake/tuning.json`` and can be
+moved by setting ``JPAKE_TUNING_CACHE``.  Calibrated values can be overridden
+for every parameter set by setting ``JPAKE_TUNING`` to a comma separated list
+of assignments, for example ``fixed_base_window=5,multi_window=4``, or for a
+single instance by passing ``tuning`` to :class:`~jpake.JPAKE`.
+
+To calibrate all of the builtin parameter sets run::
+
+    python benchmarks/calibrate.py
+"""
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from hashlib import sha256
+from random import SystemRandom
+
+from jpake.exponentiation import (
+    DEFAULT_MULTI_WINDOW, DEFAULT_TABLE_WINDOW, FixedBaseTable, multi_pow,
+)
+
+
+_logger = logging.getLogger(__name__)
+
+
+#: Window sizes tried by :func:`calibrate` if none are given.
+DEFAULT_CANDIDATES = (2, 3, 4, 5, 6, 7)
+
+
+class Tuning(object):
+    """
+    Window sizes, in bits, for each of the places where :class:`jpake.JPAKE`
+    does exponentiation.
+
+    :param fixed_base_window:
+        Window for the shared table of powers of the group generator.
+    :param session_window:
+        Window for the per-session table built for the base of ``A``.
+    :param multi_window:
+        Window used by :func:`~jpake.exponentiation.multi_pow` for proof
+        verification and the computation of ``K``.
+    """
+    __slots__ = ['fixed_base_window', 'session_window', 'multi_window']
+
+    def __init__(
+        self, *,
+        fixed_base_window=DEFAULT_TABLE_WINDOW,
+        session_window=DEFAULT_TABLE_WINDOW,
+        multi_window=DEFAULT_MULTI_WINDOW
+    ):
+        for name, value in (
+            ('fixed_base_window', fixed_base_window),
+            ('session_window', session_window),
+            ('multi_window', multi_window),
+        ):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError("%s must be a positive integer" % name)
+            setattr(self, name, value)
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Builds a :class:`Tuning` from a string of the form
+        ``"fixed_base_window=5,multi_window=4"``.
+        """
+        kwargs = {}
+        for assignment in value.split(','):
+            if not assignment.strip():
+                continue
+            name, _, window = assignment.partition('=')
+            name = name.strip()
+            if name not in cls.__slots__:
+                raise ValueError("unknown tuning parameter %r" % name)
+            kwargs[name] = int(window)
+        return cls(**kwargs)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, Tuning):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return "Tuning(%s)" % ", ".join(
+            "%s=%d" % item for item in sorted(self.as_dict().items())
+        )
+
+
+def default_cache_path():
+    """Returns the path of the file that calibration results are saved to.
+    """
+    path = os.environ.get('JPAKE_TUNING_CACHE')
+    if path:
+        return path
+
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    if not cache_home:
+        cache_home = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'jpake', 'tuning.json')
+
+
+def _cache_key(parameters):
+    """
+    Identifies a parameter set running on the current interpreter and
+    machine.
+    """
+    fingerprint = sha256(b"".join(
+        value.to_bytes((value.bit_length() + 7) // 8, 'big') + b'\x00'
+        for value in (parameters.p, parameters.q, parameters.g)
+    )).hexdigest()[:16]
+    return "%s-%d.%d-%s-%s" % (
+        sys.implementation.name,
+        sys.version_info[0], sys.version_info[1],
+        platform.machine(),
+        fingerprint,
+    )
+
+
+_lock = threading.Lock()
+_loaded = {}
+
+# Invalid values of ``JPAKE_TUNING`` that have already been warned about.
+_rejected = set()
+
+
+def _load(path):
+    with _lock:
+        entries = _loaded.get(path)
+        if entries is None:
+            try:
+                with open(path) as cache_file:
+                    entries = json.load(cache_file)
+                if not isinstance(entries, dict):
+                    entries = {}
+            except (OSError, ValueError):
+                entries = {}
+            _loaded[path] = entries
+        return entries
+
+
+def _save(path, key, tuning):
+    with _lock:
+        entries = {}
+        try:
+            with open(path) as cache_file:
+                entries = json.load(cache_file)
+            if not isinstance(entries, dict):
+                entries = {}
+        except (OSError, ValueError):
+            pass
+        entries[key] = tuning.as_dict()
+
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename so that concurrent readers
+        # never see a partially written file.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump(entries, tmp_file, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        _loaded[path] = entries
+
+
+def get_tuning(parameters, *, path=None):
+    """
+    Returns the :class:`Tuning` to use for ``parameters``.
+
+    In order of preference this is the value of ``JPAKE_TUNING``, the result
+    of a previous call to :func:`calibrate` on this machine, or the library
+    defaults.  The cache file is only read once per process.
+
+    An invalid value of ``JPAKE_TUNING`` is ignored, with a warning logged
+    the first time it is seen.
+    """
+    override = os.environ.get('JPAKE_TUNING')
+    if override:
+        try:
+            return Tuning.parse(override)
+        except ValueError as e:
+            if override not in _rejected:
+                _rejected.add(override)
+                _logger.warning(
+                    "ignoring invalid JPAKE_TUNING %r: %s", override, e,
+                )
+
+    if path is None:
+        path = default_cache_path()
+
+    entry = _load(path).get(_cache_key(parameters))
+    if entry is not None:
+        try:
+            return Tuning(**entry)
+        except (TypeError, ValueError):
+            pass
+    return Tuning()
+
+
+def _median_time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _fastest(candidates, make_fn, repeat):
+    return min(
+        candidates,
+        key=lambda window: _median_time(make_fn(window), repeat),
+    )
+
+
+def calibrate(
+    parameters, *, candidates=DEFAULT_CANDIDATES, repeat=10,
+    save=True, path=None, random=None
+):
+    """
+    Benchmarks each of the ``candidates`` window sizes for each of the
+    exponentiation routines used with ``parameters`` and returns the fastest
+    combination as a :class:`Tuning`.
+
+    :param parameters:
+        The :class:`~jpake.parameters.Parameters` to calibrate for.
+    :param candidates:
+        Window sizes to try.
+    :param repeat:
+        Number of timed runs per candidate.  The median is compared.
+    :param save:
+        If ``True`` the result is written to the cache file, where it will be
+        found by :func:`get_tuning`.
+    :param path:
+        The cache file to use.  Defaults to :func:`default_cache_path`.
+    """
+    if random is None:
+        random = SystemRandom()
+
+    p = parameters.p
+    q = parameters.q
+    g = parameters.g
+    bits = q.bit_length()
+
+    def element():
+        return pow(g, random.randrange(q), p)
+
+    # Exponentiation of the generator.  The table itself is built once per
+    # process so only evaluation is timed.
+    def fixed_base(window):
+        table = FixedBaseTable(g, p, bits=bits, window=window)
+        exponents = [random.randrange(q) for _ in range(4)]
+        return lambda: [table.pow(exponent) for exponent in exponents]
+
+    # Computation of ``A`` and the commitment for its proof.  As in
+    # ``JPAKE._compute_two`` the table is built once and used for both.
+    def session(window):
+        base = element()
+        exponents = [random.randrange(q) for _ in range(2)]
+
+        def run():
+            table = FixedBaseTable(base, p, bits=bits, window=window)
+            return [table.pow(exponent) for exponent in exponents]
+        return run
+
+    # Proof verification and computation of ``K``.
+    def multi(window):
+        pairs = [
+            (
+                (element(), random.randrange(q)),
+                (element(), random.getrandbits(160)),
+            ),
+            (
+                (element(), random.randrange(q)),
+                (element(), random.randrange(q)),
+            ),
+        ]
+        return lambda: [multi_pow(pair, p, window=window) for pair in pairs]
+
+    tuning = Tuning(
+        fixed_base_window=_fastest(candidates, fixed_base, repeat),
+        session_window=_fastest(candidates, session, repeat),
+        multi_window=_fastest(candidates, multi, repeat),
+    )
+
+    if save:
+        if path is None:
+            path = default_cache_path()
+        _save(path, _cache_key(parameters), tuning)
+
+    return tuning